@@ -0,0 +1,93 @@
+"""
+Concurrent load benchmark for GET /activities.
+
+Fires a fixed number of requests at one or more running API instances with a
+given concurrency and reports throughput and latency percentiles, so the same
+run can compare a build before and after a change:
+
+    # old build on :8081, new build on :8080
+    python benchmarks/bench_activities.py \
+        --url before=http://localhost:8081 --url after=http://localhost:8080 \
+        --concurrency 32 --requests 2000 --user-id 1
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def run_load(base_url: str, path: str, params: dict, concurrency: int, total_requests: int) -> dict:
+    """Issue total_requests GETs with `concurrency` in flight and collect timings"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def one_request(_):
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}", params=params, timeout=60)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    # Warm up the connection pools on both sides before measuring
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(concurrency)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration for ok, duration in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "requests": total_requests,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", required=True,
+                        help="API base URL, optionally labelled as label=url (repeatable)")
+    parser.add_argument("--path", default="/activities")
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    params = {"user_id": args.user_id} if args.user_id is not None else {}
+
+    print(f"GET {args.path} params={params} concurrency={args.concurrency} requests={args.requests}")
+    print(f"{'target':<12}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    baseline = None
+    for target in args.url:
+        label, _, url = target.partition("=") if "=" in target.split("://")[0] else (target, "", target)
+        stats = run_load(url.rstrip("/"), args.path, params, args.concurrency, args.requests)
+        print(f"{label:<12}{stats['throughput_rps']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['errors']:>8}")
+        if baseline is None:
+            baseline = stats["throughput_rps"]
+        elif baseline:
+            print(f"{'':<12}{stats['throughput_rps'] / baseline:>9.2f}x throughput vs first target")
+
+
+if __name__ == "__main__":
+    main()
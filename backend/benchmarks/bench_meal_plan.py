@@ -0,0 +1,41 @@
+"""
+Microbenchmark for the meal-plan solver, without the database or HTTP.
+
+Times plan_meals() for a synthetic recipes table (same rows as bench_recommendations.py),
+and reports how many planned days meet their calorie and protein targets.
+
+    python benchmarks/bench_meal_plan.py --recipes 50000 --days 7
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_recommendations import make_rows, measure
+from recommendations import RecipeData, RECIPE_MATRIX_MAX_TAGS
+from meal_plan import plan_meals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=50000, help="recipes in the matrix")
+    parser.add_argument("--days", type=int, default=7, help="days per plan")
+    parser.add_argument("--repeat", type=int, default=20, help="timed iterations")
+    args = parser.parse_args()
+
+    data = RecipeData.empty(RECIPE_MATRIX_MAX_TAGS).append(make_rows(args.recipes))
+    targets = {"meal_calories": 700, "meal_protein": 40.0, "daily_calories": 2100, "daily_protein": 120.0}
+
+    plan = plan_meals(data, targets, args.days)
+    median = statistics.median(measure(lambda: plan_meals(data, targets, args.days), args.repeat))
+    met = sum(day["meets_targets"] for day in plan)
+    print(f"plan {args.days} days  {1000 * median:>8.2f} ms (median of {args.repeat}), "
+          f"{met}/{len(plan)} days within targets")
+    for day in plan:
+        print(f"  day {day['day']}: {day['calories']} kcal, {day['protein']} g protein")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Microbenchmark for recipe recommendation scoring, without the database or HTTP.
+
+Builds a RecipeData for a synthetic recipes table and times one recommend() call
+(macro fit, cosine similarity to the user's own recipes and top-k selection), plus an
+incremental append of one newly inserted recipe.
+
+    python benchmarks/bench_recommendations.py --recipes 100000 --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations import RecipeData, recommend, RECIPE_MATRIX_MAX_TAGS
+
+TAGS = ["breakfast", "lunch", "dinner", "snack", "salad", "soup", "chicken", "beef", "seafood", "vegan",
+        "keto", "quick", "dessert", "rice", "noodles", "tacos", "pizza", "bowls", "skillet", "tofu"]
+
+
+def make_rows(count: int, first_id: int = 1, users: int = 1000):
+    """Rows as RECIPE_MATRIX_SQL returns them"""
+    random.seed(first_id)
+    rows = []
+    for recipe_id in range(first_id, first_id + count):
+        source_user_id = random.randint(1, users) if random.random() < 0.2 else None
+        calories = float(random.randint(100, 1200)) if random.random() < 0.98 else None
+        macros = (calories, random.uniform(1, 60), random.uniform(1, 120), random.uniform(1, 80))
+        tags = random.sample(TAGS, random.randint(0, 3))
+        rows.append((recipe_id, source_user_id) + macros + (tags,))
+    return rows
+
+
+def measure(func, repeat: int) -> List[float]:
+    func()  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100000, help="recipes in the matrix")
+    parser.add_argument("--limit", type=int, default=10, help="recipes returned per call")
+    parser.add_argument("--repeat", type=int, default=50, help="timed iterations")
+    args = parser.parse_args()
+
+    rows = make_rows(args.recipes)
+    started = time.perf_counter()
+    data = RecipeData.empty(RECIPE_MATRIX_MAX_TAGS).append(rows)
+    print(f"full load   {1000 * (time.perf_counter() - started):>8.1f} ms for {args.recipes} recipes, "
+          f"{(data.macros.nbytes + data.features.nbytes) / 2 ** 20:.1f} MiB")
+
+    # One recipe inserted at a time, each appended to the newest data as RecipeMatrix does
+    inserted = iter(make_rows(args.repeat + 1, first_id=args.recipes + 1))
+    state = {"data": data}
+
+    def append_one():
+        state["data"] = state["data"].append([next(inserted)])
+
+    append = statistics.median(measure(append_one, args.repeat))
+    print(f"append 1    {1000 * append:>8.3f} ms")
+
+    targets = {"meal_calories": 650, "meal_protein": 40.0}
+    user_id = next(row[1] for row in rows if row[1] is not None)
+    median = statistics.median(measure(lambda: recommend(data, targets, user_id, args.limit), args.repeat))
+    print(f"recommend   {1000 * median:>8.2f} ms (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Microbenchmark for list endpoint serialization, without the database or HTTP.
+
+Compares, for the same synthetic /activities page:
+  pydantic  - the previous path: Activity(...) built per row with float() conversions,
+              then FastAPI's response_model validation/serialization and JSONResponse
+  rows      - RowShape.to_dicts() on rows as the float8-cast SELECT returns them,
+              encoded with serialization.dumps (orjson when installed)
+  rows-json - the same with the standard library json fallback
+
+    python benchmarks/bench_serialization.py --rows 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import serialization
+from main import Activity, ACTIVITY_SHAPE
+
+
+def make_rows(count: int):
+    """Rows as psycopg2 returns them for the old SELECT (Decimals) and the float8-cast one"""
+    random.seed(42)
+    decimal_rows, float_rows = [], []
+    for index in range(count):
+        distance = Decimal(random.randint(10, 2000)) / 100
+        time_value = Decimal(random.randint(600, 120000)) / 1000
+        speed = Decimal(random.randint(100, 3000)) / 100
+        date = datetime.date(2025, 1, 1) + datetime.timedelta(days=index % 365)
+        base = (index + 1, 1 + index % 50, random.choice(["Running", "Cycling", "Swimming"]))
+        tail = (random.randint(50, 900), date)
+        decimal_rows.append(base + (distance, "miles", time_value, "minutes", speed, "mph") + tail)
+        float_rows.append(base + (float(distance), "miles", float(time_value), "minutes", float(speed), "mph") + tail)
+    return decimal_rows, float_rows
+
+
+def pydantic_path(rows, field) -> bytes:
+    activities = [Activity(
+        activity_id=row[0],
+        user_id=row[1],
+        activity_type=row[2],
+        distance=float(row[3]) if row[3] is not None else None,
+        distance_units=row[4],
+        time=float(row[5]) if row[5] is not None else None,
+        time_units=row[6],
+        speed=float(row[7]) if row[7] is not None else None,
+        speed_units=row[8],
+        calories_burned=row[9],
+        activity_date=str(row[10])
+    ) for row in rows]
+    content = asyncio.run(serialize_response(field=field, response_content=activities, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def rows_path(rows) -> bytes:
+    return serialization.FastJSONResponse(ACTIVITY_SHAPE.to_dicts(rows)).body
+
+
+def rows_json_path(rows) -> bytes:
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.FastJSONResponse(ACTIVITY_SHAPE.to_dicts(rows)).body
+    finally:
+        serialization.orjson = orjson
+
+
+def measure(func, repeat: int) -> List[float]:
+    func()  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=50, help="timed iterations per path")
+    args = parser.parse_args()
+
+    decimal_rows, float_rows = make_rows(args.rows)
+    field = create_response_field(name="Response_get_activities", type_=List[Activity])
+
+    paths = {
+        "pydantic": lambda: pydantic_path(decimal_rows, field),
+        "rows": lambda: rows_path(float_rows),
+        "rows-json": lambda: rows_json_path(float_rows)
+    }
+    print(f"encoder: {'orjson' if serialization.orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'path':<10} {'median ms':>10} {'rows/s':>12} {'speedup':>8}")
+    baseline = None
+    for label, func in paths.items():
+        median = statistics.median(measure(func, args.repeat))
+        baseline = baseline or median
+        print(f"{label:<10} {1000 * median:>10.2f} {args.rows / median:>12.0f} {baseline / median:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import io
+import csv
+import time
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from units import CANONICAL_COLUMNS, backfill_canonical_units
+
+# Load environment variables
+load_dotenv()
+
+# Rows sent per COPY statement; bounds memory no matter how large the CSV is
+BULK_CHUNK_ROWS = int(os.getenv('BULK_CHUNK_ROWS', '50000'))
+
+# Biometrics are unique per (user_id, date); a new value for a day replaces the old one
+BIOMETRICS_ON_CONFLICT = """ON CONFLICT (user_id, date) DO UPDATE SET
+    weight = EXCLUDED.weight, weight_units = EXCLUDED.weight_units, avg_hr = EXCLUDED.avg_hr,
+    high_hr = EXCLUDED.high_hr, low_hr = EXCLUDED.low_hr, notes = EXCLUDED.notes, weight_kg = EXCLUDED.weight_kg"""
+
+# Sample CSV files and how each maps onto its table
+SAMPLE_DATA = {
+    'users': {
+        'path': 'fakeData/userData.csv',
+        'table': 'users',
+        'columns': ['name', 'email', 'weight_goal', 'password'],
+        # Re-running the loader skips users that already exist
+        'on_conflict': 'ON CONFLICT (email) DO NOTHING'
+    },
+    'activities': {
+        'path': 'fakeData/activityData.csv',
+        'table': 'activities',
+        'columns': ['user_id', 'activity_date', 'activity_type', 'distance', 'distance_units',
+                    'time', 'time_units', 'speed', 'speed_units', 'calories_burned']
+    },
+    'biometrics': {
+        'path': 'fakeData/biometricData.csv',
+        'table': 'biometrics',
+        'columns': ['user_id', 'date', 'weight', 'weight_units', 'avg_hr', 'high_hr', 'low_hr', 'notes'],
+        'on_conflict': BIOMETRICS_ON_CONFLICT,
+        # DO UPDATE cannot touch a row twice in one statement, so only the file's last row per day is kept
+        'unique_key': ['user_id', 'date']
+    },
+    'exercise_definitions': {
+        'path': 'fakeData/exerciseDefinitions.csv',
+        'table': 'exercise_definitions',
+        'columns': ['exercise_name', 'avg_met_value']
+    },
+    'recipes': {
+        'path': 'fakeData/recipeData.csv',
+        'table': 'recipes',
+        'columns': ['recipe_name', 'recipe_type', 'recipe_source', 'source_user_id', 'recipe_url',
+                    'ingredients', 'instructions', 'directions', 'calories', 'fat', 'carbs', 'protein',
+                    'extra_categories']
+    }
+}
+
+def project_csv_rows(reader: Iterable[List[str]], header: List[str], columns: List[str]) -> Iterable[List[str]]:
+    """
+    Reorder CSV rows to the given columns. Columns missing from the file come out empty,
+    and for duplicated headers the last occurrence wins (matching csv.DictReader).
+    """
+    positions = {name.strip(): index for index, name in enumerate(header)}
+    indexes = [positions.get(column) for column in columns]
+    for row in reader:
+        if not row:
+            continue
+        yield [row[index] if index is not None and index < len(row) else '' for index in indexes]
+
+def copy_rows(cursor, table: str, columns: List[str], rows: Iterable[List], chunk_rows: int = None) -> int:
+    """
+    Stream rows into a table with COPY ... FROM STDIN in chunks of chunk_rows.
+    Empty strings and None are loaded as NULL; dates and numbers are parsed by Postgres.
+    Returns the number of rows copied.
+    """
+    chunk_rows = chunk_rows or BULK_CHUNK_ROWS
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            total += pending
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        total += pending
+    return total
+
+def bulk_load_csv(cursor, path: str, table: str, columns: List[str], on_conflict: Optional[str] = None,
+                  unique_key: Optional[List[str]] = None, chunk_rows: int = None) -> Dict:
+    """
+    Load a CSV file into a table with COPY.
+
+    Dates in the sample files are M/D/YYYY, so the transaction's DateStyle is set to MDY
+    and Postgres parses every date and number in one set-based pass instead of per row in
+    Python. When on_conflict is given, rows are copied into a temporary staging table first
+    and moved with INSERT ... SELECT ... <on_conflict>; with unique_key, only the last row
+    of the file for each key is moved.
+    Returns the rows loaded, elapsed seconds and rows per second.
+    """
+    started = time.perf_counter()
+    cursor.execute("SET LOCAL datestyle TO 'ISO, MDY'")
+
+    target = table
+    if on_conflict:
+        target = f"pg_temp.{table}_staging"
+        cursor.execute(f"DROP TABLE IF EXISTS {target}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {target} ON COMMIT DROP AS "
+            f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+        )
+        cursor.execute(f"ALTER TABLE {target} ADD COLUMN staging_seq bigint GENERATED ALWAYS AS IDENTITY")
+
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        rows_loaded = copy_rows(cursor, target, columns, project_csv_rows(reader, header, columns), chunk_rows)
+
+    if on_conflict:
+        column_list = ', '.join(columns)
+        source = f"SELECT {column_list} FROM {target}"
+        if unique_key:
+            key_list = ', '.join(unique_key)
+            source = f"SELECT DISTINCT ON ({key_list}) {column_list} FROM {target} ORDER BY {key_list}, staging_seq DESC"
+        cursor.execute(f"INSERT INTO {table} ({column_list}) {source} {on_conflict}")
+        rows_loaded = cursor.rowcount
+        cursor.execute(f"DROP TABLE {target}")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows_loaded": rows_loaded,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_loaded / elapsed, 1) if elapsed > 0 else None
+    }
+
+def load_sample_data(cursor, name: str) -> Dict:
+    """
+    Bulk load one of the SAMPLE_DATA files ('users', 'activities', ...).
+    COPY only fills the CSV's columns, so canonical unit columns are backfilled afterwards
+    in the same transaction.
+    """
+    spec = SAMPLE_DATA[name]
+    stats = bulk_load_csv(cursor, **spec)
+    if spec['table'] in CANONICAL_COLUMNS:
+        backfill_canonical_units(cursor, spec['table'], commit=False)
+    return stats
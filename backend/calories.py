@@ -0,0 +1,25 @@
+from typing import List, Optional
+import numpy as np
+import units
+
+# Weight used when a user has no (or a zero) weight on record
+DEFAULT_WEIGHT_KG = 70.0
+
+SECONDS_PER_HOUR = 3600.0
+
+def weight_to_kg(weight: float, weight_units: Optional[str]) -> float:
+    """Convert a biometric weight to kg (missing units count as lbs, unknown units as kg)"""
+    return units.weight_kg(weight, weight_units)
+
+def fill_default_weights(weights_kg: List[Optional[float]]) -> np.ndarray:
+    """Weights in kg as an array, with missing or zero weights replaced by DEFAULT_WEIGHT_KG"""
+    values = np.array([weight if weight is not None else np.nan for weight in weights_kg], dtype=np.float64)
+    return np.where(np.isnan(values) | (values == 0), DEFAULT_WEIGHT_KG, values)
+
+def seconds_to_hours(seconds: List[Optional[float]]) -> np.ndarray:
+    """Canonical durations (time_seconds) as hours; missing durations give 0 hours"""
+    return np.array([value or 0.0 for value in seconds], dtype=np.float64) / SECONDS_PER_HOUR
+
+def calories_burned(met_values: np.ndarray, weights_kg: np.ndarray, hours: np.ndarray) -> np.ndarray:
+    """MET × weight (kg) × time (hours), truncated toward zero like int()"""
+    return np.trunc(met_values * weights_kg * hours).astype(np.int64)
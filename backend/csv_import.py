@@ -0,0 +1,251 @@
+import os
+import csv
+import time
+import uuid
+import codecs
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from multipart.multipart import MultipartParser, parse_options_header
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Validated rows inserted per transaction while an upload is streaming in
+IMPORT_CHUNK_ROWS = int(os.getenv('IMPORT_CHUNK_ROWS', '1000'))
+# Row-level validation errors returned in the import summary (the rest are only counted)
+IMPORT_MAX_ERRORS = 100
+# Finished imports kept for progress polling (seconds)
+IMPORT_TTL = 3600
+
+class _LineFeed:
+    """Iterator over queued lines that csv.reader can keep pulling from as more arrive"""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+def ends_in_quoted_field(line: str, in_quotes: bool) -> bool:
+    """
+    Whether a quoted field is still open at the end of line, given whether one was open at its start.
+    Follows the csv module's default dialect: only a quote that opens a field starts a quoted field
+    (so 5'10" in an unquoted field is literal), and "" inside one is an escaped quote.
+    """
+    pos = 0
+    while True:
+        if in_quotes:
+            close = line.find('"', pos)
+            if close < 0:
+                return True
+            if line.startswith('"', close + 1):
+                pos = close + 2
+                continue
+            # Anything after the closing quote is literal up to the next delimiter
+            in_quotes = False
+            pos = close + 1
+        elif line.startswith('"', pos):
+            in_quotes = True
+            pos += 1
+            continue
+        comma = line.find(',', pos)
+        if comma < 0:
+            return False
+        pos = comma + 1
+
+class IncrementalCsvReader:
+    """
+    Parse CSV text delivered as arbitrary byte chunks.
+    Rows are returned as soon as their record is complete, including quoted fields
+    that span lines, so the whole file never has to be held in memory.
+    """
+
+    def __init__(self, encoding: str = 'utf-8-sig'):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._partial = ''
+        self._in_quotes = False
+        self._feed = _LineFeed()
+        self._reader = csv.reader(self._feed)
+
+    def feed(self, data: bytes) -> List[List[str]]:
+        text = self._partial + self._decoder.decode(data)
+        cut = text.rfind('\n') + 1
+        self._partial = text[cut:]
+        for line in text[:cut].split('\n')[:-1]:
+            self._push(line + '\n')
+        return self._drain()
+
+    def close(self) -> List[List[str]]:
+        text = self._partial + self._decoder.decode(b'', final=True)
+        self._partial = ''
+        if text:
+            self._push(text + '\n')
+        self._in_quotes = False
+        return self._drain()
+
+    def _push(self, line: str):
+        self._feed.lines.append(line)
+        if self._in_quotes or '"' in line:
+            self._in_quotes = ends_in_quoted_field(line, self._in_quotes)
+
+    def _drain(self) -> List[List[str]]:
+        if self._in_quotes:
+            return []
+        return [row for row in self._reader if row]
+
+async def stream_csv_upload(request, progress: Dict, field_name: str = 'file') -> AsyncIterator[List[List[str]]]:
+    """
+    Parse a multipart/form-data request body while it is being received and yield
+    batches of CSV rows from the `field_name` file part. Other parts are ignored.
+    """
+    content_type, params = parse_options_header(request.headers.get('Content-Type', ''))
+    boundary = params.get(b'boundary')
+    if content_type != b'multipart/form-data' or not boundary:
+        raise ValueError("Expected a multipart/form-data upload with a boundary")
+
+    state = {'header_field': b'', 'header_value': b'', 'in_file': False, 'found': False}
+    csv_reader = IncrementalCsvReader()
+    ready = []
+
+    def on_part_begin():
+        state['in_file'] = False
+
+    def on_header_field(data, start, end):
+        state['header_field'] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state['header_value'] += data[start:end]
+
+    def on_header_end():
+        if state['header_field'].lower() == b'content-disposition':
+            _, options = parse_options_header(state['header_value'])
+            if options.get(b'name') == field_name.encode():
+                state['in_file'] = True
+                state['found'] = True
+        state['header_field'] = b''
+        state['header_value'] = b''
+
+    def on_part_data(data, start, end):
+        if state['in_file']:
+            ready.extend(csv_reader.feed(data[start:end]))
+
+    def on_part_end():
+        if state['in_file']:
+            ready.extend(csv_reader.close())
+            state['in_file'] = False
+
+    parser = MultipartParser(boundary, {
+        'on_part_begin': on_part_begin,
+        'on_header_field': on_header_field,
+        'on_header_value': on_header_value,
+        'on_header_end': on_header_end,
+        'on_part_data': on_part_data,
+        'on_part_end': on_part_end
+    })
+
+    async for chunk in request.stream():
+        progress['bytes_received'] += len(chunk)
+        parser.write(chunk)
+        if ready:
+            yield ready
+            ready = []
+    parser.finalize()
+    if ready:
+        yield ready
+    if not state['found']:
+        raise ValueError(f"No '{field_name}' file part found in the upload")
+
+def parse_date(value: str) -> str:
+    """Accept YYYY-MM-DD or M/D/YYYY dates and return them as YYYY-MM-DD"""
+    value = value.strip()
+    for date_format in ('%Y-%m-%d', '%m/%d/%Y'):
+        try:
+            return datetime.strptime(value, date_format).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date '{value}' (expected YYYY-MM-DD or M/D/YYYY)")
+
+def blank_to_none(record: Dict) -> Dict:
+    """Strip whitespace and turn empty CSV fields into None"""
+    return {key.strip(): (value.strip() or None) if isinstance(value, str) else value
+            for key, value in record.items() if key}
+
+# import_id -> progress, for polling while an upload is running
+imports: Dict[str, Dict] = {}
+
+def start_import(kind: str, import_id: Optional[str], total_bytes: Optional[int]) -> Dict:
+    """Register a new import and return its progress record"""
+    cutoff = time.time() - IMPORT_TTL
+    for stale_id in [key for key, value in imports.items()
+                     if value['finished_at'] is not None and value['finished_at'] < cutoff]:
+        del imports[stale_id]
+
+    import_id = import_id or uuid.uuid4().hex
+    if import_id in imports and imports[import_id]['status'] == 'running':
+        raise ValueError(f"Import '{import_id}' is already running")
+    progress = {
+        "import_id": import_id,
+        "kind": kind,
+        "status": "running",
+        "bytes_received": 0,
+        "total_bytes": total_bytes,
+        "rows_parsed": 0,
+        "rows_inserted": 0,
+        "rows_rejected": 0,
+        "errors": [],
+        "started_at": time.time(),
+        "finished_at": None
+    }
+    imports[import_id] = progress
+    return progress
+
+async def import_csv_upload(request, progress: Dict, to_values: Callable[[Dict], tuple],
+                            insert_rows: Callable[[List[tuple]], int], chunk_rows: int = None) -> Dict:
+    """
+    Stream a CSV upload into the database.
+    Each row is converted with to_values (which validates it and raises ValidationError or
+    ValueError for bad rows); valid rows are inserted every chunk_rows rows with insert_rows,
+    which runs in the thread pool. Progress is updated in place as the upload is consumed.
+    """
+    chunk_rows = chunk_rows or IMPORT_CHUNK_ROWS
+    header = None
+    pending = []
+    try:
+        async for rows in stream_csv_upload(request, progress):
+            for row in rows:
+                if header is None:
+                    header = [name.strip() for name in row]
+                    continue
+                progress['rows_parsed'] += 1
+                try:
+                    pending.append(to_values(blank_to_none(dict(zip(header, row)))))
+                except (ValidationError, ValueError) as e:
+                    progress['rows_rejected'] += 1
+                    if len(progress['errors']) < IMPORT_MAX_ERRORS:
+                        # +1 for the header line, +1 for 1-based numbering
+                        progress['errors'].append({"row": progress['rows_parsed'] + 1, "error": str(e)})
+                if len(pending) >= chunk_rows:
+                    progress['rows_inserted'] += await run_in_threadpool(insert_rows, pending)
+                    pending = []
+        if pending:
+            progress['rows_inserted'] += await run_in_threadpool(insert_rows, pending)
+        progress['status'] = 'completed'
+    except Exception as e:
+        progress['status'] = 'failed'
+        progress['error'] = str(e)
+        raise
+    finally:
+        progress['finished_at'] = time.time()
+
+    elapsed = progress['finished_at'] - progress['started_at']
+    progress['rows_per_second'] = round(progress['rows_inserted'] / elapsed, 1) if elapsed > 0 else None
+    return progress
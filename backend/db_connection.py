@@ -1,235 +1,367 @@
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-import os
-import psycopg2
-
-def get_db_connection():
-    """
-    Get a database connection
-    """
-    # Cloud SQL connection name for Cloud Run
-    db_connection_name = os.environ.get('DB_CONNECTION_NAME')
-    print(db_connection_name)
-    # Credentials
-    db_user = os.getenv('DB_USER')
-    db_name = os.getenv('DB_NAME')
-    db_password = os.getenv('DB_PASSWORD')
-
-    if db_connection_name:
-        # Use Unix domain socket for Cloud Run
-        print("Using Unix domain socket for Cloud SQL connection.")
-        unix_socket_dir = f"/cloudsql/{db_connection_name}"
-        return psycopg2.connect(
-            user=db_user,
-            password=db_password,
-            database=db_name,
-            host=unix_socket_dir
-        )
-    else:
-        # Fallback to local connection using host/port
-        print("Using fallback host/port for local or external connection.")
-        host = os.getenv('DB_HOST')
-        port = os.getenv('DB_PORT', '5432')
-        return psycopg2.connect(
-            host=host,
-            port=port,
-            database=db_name,
-            user=db_user,
-            password=db_password
-        )
-
-def initialize_database():
-    """
-    Initialize the database by creating users and activities tables
-    """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                weight_goal VARCHAR(20),
-                password VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create activities table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS activities (
-                activity_id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                activity_date DATE NOT NULL,
-                activity_type VARCHAR(100) NOT NULL,
-                distance DECIMAL(10,2),
-                distance_units VARCHAR(20),
-                time DECIMAL(10,3),
-                time_units VARCHAR(20),
-                speed DECIMAL(10,2),
-                speed_units VARCHAR(20),
-                calories_burned INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create biometrics table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS biometrics (
-                biometric_id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                date DATE NOT NULL,
-                weight DECIMAL(5,2),
-                weight_units VARCHAR(10),
-                avg_hr INTEGER,
-                high_hr INTEGER,
-                low_hr INTEGER,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create exercise_definitions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS exercise_definitions (
-                exercise_id SERIAL PRIMARY KEY,
-                exercise_name VARCHAR(100) NOT NULL,
-                avg_met_value DECIMAL(4,2) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create recipes table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS recipes (
-                recipe_id SERIAL PRIMARY KEY,
-                recipe_name VARCHAR(255) NOT NULL,
-                recipe_type VARCHAR(50),
-                recipe_source VARCHAR(100),
-                source_user_id INTEGER,
-                recipe_url TEXT,
-                ingredients TEXT,
-                instructions TEXT,
-                directions TEXT,
-                calories INTEGER,
-                fat DECIMAL(5,2),
-                carbs DECIMAL(5,2),
-                protein DECIMAL(5,2),
-                extra_categories VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Commit the changes
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            'success': True,
-            'message': 'Database initialized successfully',
-            'tables_created': ['users', 'activities', 'biometrics', 'exercise_definitions', 'recipes']
-        }
-        
-    except psycopg2.Error as e:
-        return {
-            'success': False,
-            'error': f'Database initialization failed: {str(e)}',
-            'error_code': e.pgcode if hasattr(e, 'pgcode') else None
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'error': f'Unexpected error: {str(e)}'
-        }
-
-def test_gcp_postgres_connection():
-    """
-    Test connection to GCP PostgreSQL
-    Returns a dictionary with connection status and details
-    """
-    try:
-        # Get database connection parameters from environment
-        host = os.getenv('DB_HOST')
-        port = os.getenv('DB_PORT', '5432')
-        database = os.getenv('DB_NAME')
-        username = os.getenv('DB_USER')
-        password = os.getenv('DB_PASSWORD')
-        
-        # Check if required parameters are set
-        if not all([host, database, username, password]):
-            return {
-                'success': False,
-                'error': 'Missing database connection parameters',
-                'missing_params': [param for param, value in [
-                    ('DB_HOST', host), ('DB_NAME', database), 
-                    ('DB_USER', username), ('DB_PASSWORD', password)
-                ] if not value]
-            }
-        
-        # Test connection
-        print(f"Attempting to connect to {host}:{port}/{database}...")
-        conn = psycopg2.connect(
-            host=host,
-            port=port,
-            database=database,
-            user=username,
-            password=password
-        )
-        
-        # Test a simple query
-        cursor = conn.cursor()
-        cursor.execute("SELECT version()")
-        version = cursor.fetchone()[0]
-        
-        # Get list of databases
-        cursor.execute("SELECT datname FROM pg_database WHERE datistemplate = false")
-        databases = [row[0] for row in cursor.fetchall()]
-        
-        # Close connection
-        cursor.close()
-        conn.close()
-        
-        return {
-            'success': True,
-            'message': 'Successfully connected to GCP PostgreSQL',
-            'server_info': {
-                'host': host,
-                'port': port,
-                'database': database,
-                'version': version,
-                'available_databases': databases
-            }
-        }
-        
-    except psycopg2.Error as e:
-        return {
-            'success': False,
-            'error': f'Database connection failed: {str(e)}',
-            'error_code': e.pgcode if hasattr(e, 'pgcode') else None
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'error': f'Unexpected error: {str(e)}'
-        }
-
-def get_connection_info():
-    """
-    Get database connection information without testing the connection
-    """
-    return {
-        'host': os.getenv('DB_HOST'),
-        'port': os.getenv('DB_PORT', '5432'),
-        'database': os.getenv('DB_NAME'),
-        'username': os.getenv('DB_USER'),
-        'password_set': bool(os.getenv('DB_PASSWORD'))
+import psycopg2
+import psycopg2.extensions
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+def get_db_connection():
+    """
+    Open a new, unpooled database connection.
+    Request handlers should use pooled_connection() instead.
+    """
+    # Cloud SQL connection name for Cloud Run
+    db_connection_name = os.environ.get('DB_CONNECTION_NAME')
+    # Credentials
+    db_user = os.getenv('DB_USER')
+    db_name = os.getenv('DB_NAME')
+    db_password = os.getenv('DB_PASSWORD')
+
+    if db_connection_name:
+        # Use Unix domain socket for Cloud Run
+        unix_socket_dir = f"/cloudsql/{db_connection_name}"
+        return psycopg2.connect(
+            user=db_user,
+            password=db_password,
+            database=db_name,
+            host=unix_socket_dir
+        )
+    else:
+        # Fallback to local connection using host/port
+        host = os.getenv('DB_HOST')
+        port = os.getenv('DB_PORT', '5432')
+        return psycopg2.connect(
+            host=host,
+            port=port,
+            database=db_name,
+            user=db_user,
+            password=db_password
+        )
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout"""
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections shared by the whole process.
+
+    Connections are opened lazily up to max_size, kept warm down to min_size,
+    and health-checked when borrowed: closed connections are replaced, and
+    connections idle for longer than ping_after seconds are pinged first.
+    """
+
+    def __init__(self, min_size: int = 1, max_size: int = 10, timeout: float = 10.0,
+                 ping_after: float = 30.0, connect=get_db_connection):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._connect = connect
+        self._idle = deque()  # (connection, last returned at)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_discarded": 0,
+            "wait_time_total": 0.0,
+        }
+
+    def open(self):
+        """Open min_size connections up front so the first requests do not pay for the handshake"""
+        with self._cond:
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        for opened in range(missing):
+            try:
+                conn = self._new_connection()
+            except Exception:
+                # Give back this slot and every later one reserved above, not just this one
+                with self._cond:
+                    self._size -= missing - opened
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, timeout: float = None):
+        """Borrow a connection, waiting up to timeout seconds for one to be returned"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        conn = None
+        last_used = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+                if self._idle:
+                    # LIFO keeps the hottest connections in use and lets the rest age out
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {timeout:.1f}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += time.monotonic() - started
+
+        try:
+            if conn is None or not self._is_healthy(conn, last_used):
+                if conn is not None:
+                    self._discard(conn)
+                conn = self._new_connection()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn):
+        """Return a borrowed connection, rolling back any transaction left open"""
+        reusable = not conn.closed
+        if reusable and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        with self._cond:
+            keep = reusable and not self._closed
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        """Snapshot of pool occupancy and lifetime counters"""
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": checkouts,
+                "timeouts": self._stats["timeouts"],
+                "connections_opened": self._stats["connections_opened"],
+                "connections_discarded": self._stats["connections_discarded"],
+                "avg_wait_ms": round(1000 * self._stats["wait_time_total"] / checkouts, 3) if checkouts else 0.0,
+            }
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._stats["connections_discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, last_used) -> bool:
+        if conn.closed:
+            return False
+        if last_used is not None and time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use.
+    Sizing is read from DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT and DB_POOL_PING_AFTER.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                    max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', '10')),
+                    ping_after=float(os.getenv('DB_POOL_PING_AFTER', '30'))
+                )
+    return _pool
+
+def close_pool():
+    """Close the process-wide pool (used on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a connection from the process-wide pool for the duration of a with-block.
+    Uncommitted work is rolled back when the block exits.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+def get_pool_stats() -> dict:
+    """Get connection pool statistics"""
+    return get_pool().stats()
+
+def initialize_database():
+    """
+    Initialize the database by applying any pending schema migrations
+    (tables, indexes and later schema changes; existing data is kept)
+    """
+    from migrations import run_migrations
+    try:
+        applied = run_migrations()
+        
+        return {
+            'success': True,
+            'message': 'Database initialized successfully',
+            'tables_created': ['users', 'activities', 'biometrics', 'exercise_definitions', 'recipes'],
+            'migrations_applied': applied
+        }
+        
+    except psycopg2.Error as e:
+        return {
+            'success': False,
+            'error': f'Database initialization failed: {str(e)}',
+            'error_code': e.pgcode if hasattr(e, 'pgcode') else None
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Unexpected error: {str(e)}'
+        }
+
+def test_gcp_postgres_connection():
+    """
+    Test connection to GCP PostgreSQL
+    Returns a dictionary with connection status and details
+    """
+    try:
+        # Get database connection parameters from environment
+        host = os.getenv('DB_HOST')
+        port = os.getenv('DB_PORT', '5432')
+        database = os.getenv('DB_NAME')
+        username = os.getenv('DB_USER')
+        password = os.getenv('DB_PASSWORD')
+        
+        # Check if required parameters are set
+        if not all([host, database, username, password]):
+            return {
+                'success': False,
+                'error': 'Missing database connection parameters',
+                'missing_params': [param for param, value in [
+                    ('DB_HOST', host), ('DB_NAME', database), 
+                    ('DB_USER', username), ('DB_PASSWORD', password)
+                ] if not value]
+            }
+        
+        # Test connection
+        print(f"Attempting to connect to {host}:{port}/{database}...")
+        conn = psycopg2.connect(
+            host=host,
+            port=port,
+            database=database,
+            user=username,
+            password=password
+        )
+        
+        # Test a simple query
+        cursor = conn.cursor()
+        cursor.execute("SELECT version()")
+        version = cursor.fetchone()[0]
+        
+        # Get list of databases
+        cursor.execute("SELECT datname FROM pg_database WHERE datistemplate = false")
+        databases = [row[0] for row in cursor.fetchall()]
+        
+        # Close connection
+        cursor.close()
+        conn.close()
+        
+        return {
+            'success': True,
+            'message': 'Successfully connected to GCP PostgreSQL',
+            'server_info': {
+                'host': host,
+                'port': port,
+                'database': database,
+                'version': version,
+                'available_databases': databases
+            }
+        }
+        
+    except psycopg2.Error as e:
+        return {
+            'success': False,
+            'error': f'Database connection failed: {str(e)}',
+            'error_code': e.pgcode if hasattr(e, 'pgcode') else None
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Unexpected error: {str(e)}'
+        }
+
+def get_connection_info():
+    """
+    Get database connection information without testing the connection
+    """
+    return {
+        'host': os.getenv('DB_HOST'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'database': os.getenv('DB_NAME'),
+        'username': os.getenv('DB_USER'),
+        'password_set': bool(os.getenv('DB_PASSWORD'))
     } 
\ No newline at end of file
@@ -1,1282 +1,1371 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-import os
-from dotenv import load_dotenv
-from db_connection import test_gcp_postgres_connection, get_connection_info, initialize_database, get_db_connection
-from fastapi import HTTPException
-import csv
-import io
-from datetime import datetime
-from recipe_generation import generate_and_save_recipe
-
-# Load environment variables
-load_dotenv()
-
-# Create FastAPI app
-app = FastAPI(
-    title="Fitness API",
-    description="A simple fitness tracking API",
-    version="1.0.0"
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Simple data models
-class User(BaseModel):
-    id: Optional[int] = None
-    name: str
-    email: str
-    weight_goal: Optional[str] = None
-    password: Optional[str] = None
-
-class Activity(BaseModel):
-    activity_id: Optional[int] = None
-    user_id: int
-    activity_type: str
-    distance: Optional[float] = None
-    distance_units: Optional[str] = None
-    time: Optional[float] = None
-    time_units: Optional[str] = None
-    speed: Optional[float] = None
-    speed_units: Optional[str] = None
-    calories_burned: Optional[int] = None
-    activity_date: str
-
-class Biometrics(BaseModel):
-    biometric_id: Optional[int] = None
-    user_id: int
-    date: str
-    weight: Optional[float] = None
-    weight_units: Optional[str] = None
-    avg_hr: Optional[int] = None
-    high_hr: Optional[int] = None
-    low_hr: Optional[int] = None
-    notes: Optional[str] = None
-
-class ExerciseDefinition(BaseModel):
-    exercise_id: Optional[int] = None
-    exercise_name: str
-    avg_met_value: float
-
-class Recipe(BaseModel):
-    recipe_id: Optional[int] = None
-    recipe_name: str
-    recipe_type: Optional[str] = None
-    recipe_source: Optional[str] = None
-    source_user_id: Optional[int] = None
-    recipe_url: Optional[str] = None
-    ingredients: Optional[str] = None
-    instructions: Optional[str] = None
-    directions: Optional[str] = None
-    calories: Optional[int] = None
-    fat: Optional[float] = None
-    carbs: Optional[float] = None
-    protein: Optional[float] = None
-    extra_categories: Optional[str] = None
-
-class RecipeGenerationRequest(BaseModel):
-    user_id: int
-    user_directions: str
-    model: Optional[str] = "gpt-3.5-turbo"
-
-class LoginRequest(BaseModel):
-    email: str
-    password: str
-
-# Basic endpoints
-@app.get("/")
-async def root():
-    """Root endpoint"""
-    return {"message": "Fitness API is running!", "version": "1.0.0"}
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint for Docker and load balancers"""
-    try:
-        # Test database connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
-        
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy", 
-            "database": "disconnected",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }
-
-
-
-@app.get("/test-connection")
-async def test_connection():
-    """Test GCP PostgreSQL connection"""
-    return test_gcp_postgres_connection()
-
-@app.get("/connection-info")
-async def get_db_info():
-    """Get database connection information (without testing)"""
-    return get_connection_info()
-
-@app.post("/init-database")
-async def init_database():
-    """Initialize database tables"""
-    return initialize_database()
-
-@app.post("/login")
-async def login(login_request: LoginRequest):
-    """Attempt to login with email and password"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if user exists with the provided email and password
-        cursor.execute("""
-            SELECT id, name, email, weight_goal 
-            FROM users 
-            WHERE email = %s AND password = %s
-        """, (login_request.email, login_request.password))
-        
-        user_row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if user_row:
-            return {
-                "success": True,
-                "message": "Login successful",
-                "user": {
-                    "id": user_row[0],
-                    "name": user_row[1],
-                    "email": user_row[2],
-                    "weight_goal": user_row[3]
-                }
-            }
-        else:
-            return {
-                "success": False,
-                "message": "Invalid email or password"
-            }
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
-
-# User endpoints
-@app.get("/users", response_model=List[User])
-async def get_users():
-    """Get all users"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, email, weight_goal, password FROM users ORDER BY id")
-    users = []
-    for row in cursor.fetchall():
-        users.append(User(id=row[0], name=row[1], email=row[2], weight_goal=row[3], password=row[4]))
-    cursor.close()
-    conn.close()
-    return users
-
-@app.get("/users/{user_id}", response_model=User)
-async def get_user(user_id: int):
-    """Get a specific user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, email, weight_goal, password FROM users WHERE id = %s", (user_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if row:
-        return User(id=row[0], name=row[1], email=row[2], weight_goal=row[3], password=row[4])
-    return {"error": "User not found"}
-
-@app.post("/users", response_model=User)
-async def create_user(user: User):
-    """Create a new user in the database"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (name, email, weight_goal, password) VALUES (%s, %s, %s, %s) RETURNING id, name, email, weight_goal, password, created_at",
-            (user.name, user.email, user.weight_goal, user.password)
-        )
-        row = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return User(id=row[0], name=row[1], email=row[2], weight_goal=row[3], password=row[4])
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-@app.get("/users/{user_id}/latest-weight")
-async def get_user_latest_weight_endpoint(user_id: int):
-    """Get the most recent weight entry for a specific user"""
-    return get_user_latest_weight(user_id)
-
-# Activity endpoints
-@app.get("/activities", response_model=List[Activity])
-async def get_activities(user_id: Optional[int] = None):
-    """Get all activities, optionally filtered by user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    if user_id:
-        cursor.execute("""
-            SELECT activity_id, user_id, activity_type, distance, distance_units, 
-                   time, time_units, speed, speed_units, calories_burned, activity_date 
-            FROM activities WHERE user_id = %s ORDER BY activity_date DESC
-        """, (user_id,))
-    else:
-        cursor.execute("""
-            SELECT activity_id, user_id, activity_type, distance, distance_units, 
-                   time, time_units, speed, speed_units, calories_burned, activity_date 
-            FROM activities ORDER BY activity_date DESC
-        """)
-    activities = []
-    for row in cursor.fetchall():
-        activities.append(Activity(
-            activity_id=row[0],
-            user_id=row[1],
-            activity_type=row[2],
-            distance=float(row[3]) if row[3] is not None else None,
-            distance_units=row[4],
-            time=float(row[5]) if row[5] is not None else None,
-            time_units=row[6],
-            speed=float(row[7]) if row[7] is not None else None,
-            speed_units=row[8],
-            calories_burned=row[9],
-            activity_date=str(row[10])
-        ))
-    cursor.close()
-    conn.close()
-    return activities
-
-@app.get("/activities/{activity_id}", response_model=Activity)
-async def get_activity(activity_id: int):
-    """Get a specific activity"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT activity_id, user_id, activity_type, distance, distance_units, 
-               time, time_units, speed, speed_units, calories_burned, activity_date 
-        FROM activities WHERE activity_id = %s
-    """, (activity_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if row:
-        return Activity(
-            activity_id=row[0],
-            user_id=row[1],
-            activity_type=row[2],
-            distance=float(row[3]) if row[3] is not None else None,
-            distance_units=row[4],
-            time=float(row[5]) if row[5] is not None else None,
-            time_units=row[6],
-            speed=float(row[7]) if row[7] is not None else None,
-            speed_units=row[8],
-            calories_burned=row[9],
-            activity_date=str(row[10])
-        )
-    return {"error": "Activity not found"}
-
-@app.post("/activities", response_model=Activity)
-async def create_activity(activity: Activity):
-    """Create a new activity in the database with automatic calorie calculation"""
-    try:
-        # Calculate calories burned automatically
-        calculated_calories = None
-        if activity.time and activity.activity_type:
-            # Get user's weight in kg
-            weight_kg = get_user_weight_kg(activity.user_id, activity.activity_date)
-            
-            # Convert time to hours
-            time_hours = 0.0
-            if activity.time_units:
-                if activity.time_units.lower() in ['minutes', 'min']:
-                    time_hours = activity.time / 60.0
-                elif activity.time_units.lower() in ['hours', 'hr']:
-                    time_hours = activity.time
-                elif activity.time_units.lower() in ['seconds', 'sec']:
-                    time_hours = activity.time / 3600.0
-                else:
-                    time_hours = activity.time / 60.0  # Default to minutes
-            
-            # Calculate calories burned
-            calculated_calories = calculate_calories_burned(activity.activity_type, weight_kg, time_hours)
-        
-        # Use calculated calories if available, otherwise use provided calories
-        final_calories = calculated_calories if calculated_calories is not None else activity.calories_burned
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO activities (user_id, activity_type, distance, distance_units, 
-                                  time, time_units, speed, speed_units, calories_burned, activity_date) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
-            RETURNING activity_id, user_id, activity_type, distance, distance_units, 
-                     time, time_units, speed, speed_units, calories_burned, activity_date
-        """, (
-            activity.user_id, activity.activity_type, activity.distance, activity.distance_units,
-            activity.time, activity.time_units, activity.speed, activity.speed_units, 
-            final_calories, activity.activity_date
-        ))
-        row = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return Activity(
-            activity_id=row[0],
-            user_id=row[1],
-            activity_type=row[2],
-            distance=float(row[3]) if row[3] is not None else None,
-            distance_units=row[4],
-            time=float(row[5]) if row[5] is not None else None,
-            time_units=row[6],
-            speed=float(row[7]) if row[7] is not None else None,
-            speed_units=row[8],
-            calories_burned=row[9],
-            activity_date=str(row[10])
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-# Biometrics endpoints
-@app.get("/biometrics", response_model=List[Biometrics])
-async def get_biometrics(user_id: Optional[int] = None):
-    """Get all biometrics, optionally filtered by user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    if user_id:
-        cursor.execute("""
-            SELECT biometric_id, user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes 
-            FROM biometrics WHERE user_id = %s ORDER BY date DESC
-        """, (user_id,))
-    else:
-        cursor.execute("""
-            SELECT biometric_id, user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes 
-            FROM biometrics ORDER BY date DESC
-        """)
-    biometrics = []
-    for row in cursor.fetchall():
-        biometrics.append(Biometrics(
-            biometric_id=row[0],
-            user_id=row[1],
-            date=str(row[2]),
-            weight=float(row[3]) if row[3] is not None else None,
-            weight_units=row[4],
-            avg_hr=row[5],
-            high_hr=row[6],
-            low_hr=row[7],
-            notes=row[8]
-        ))
-    cursor.close()
-    conn.close()
-    return biometrics
-
-@app.get("/biometrics/{biometric_id}", response_model=Biometrics)
-async def get_biometric(biometric_id: int):
-    """Get a specific biometric entry"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT biometric_id, user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes 
-        FROM biometrics WHERE biometric_id = %s
-    """, (biometric_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if row:
-        return Biometrics(
-            biometric_id=row[0],
-            user_id=row[1],
-            date=str(row[2]),
-            weight=float(row[3]) if row[3] is not None else None,
-            weight_units=row[4],
-            avg_hr=row[5],
-            high_hr=row[6],
-            low_hr=row[7],
-            notes=row[8]
-        )
-    return {"error": "Biometric entry not found"}
-
-@app.post("/biometrics", response_model=Biometrics)
-async def create_biometric(biometric: Biometrics):
-    """Create or update a biometric entry in the database (one per user per day)"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if an entry already exists for this user and date
-        cursor.execute("""
-            SELECT biometric_id FROM biometrics 
-            WHERE user_id = %s AND date = %s
-        """, (biometric.user_id, biometric.date))
-        
-        existing_entry = cursor.fetchone()
-        
-        if existing_entry:
-            # Update existing entry
-            cursor.execute("""
-                UPDATE biometrics 
-                SET weight = %s, weight_units = %s, avg_hr = %s, high_hr = %s, low_hr = %s, notes = %s
-                WHERE user_id = %s AND date = %s
-                RETURNING biometric_id, user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes
-            """, (
-                biometric.weight, biometric.weight_units, biometric.avg_hr, biometric.high_hr, biometric.low_hr, biometric.notes,
-                biometric.user_id, biometric.date
-            ))
-        else:
-            # Insert new entry
-            cursor.execute("""
-                INSERT INTO biometrics (user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) 
-                RETURNING biometric_id, user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes
-            """, (
-                biometric.user_id, biometric.date, biometric.weight, biometric.weight_units, biometric.avg_hr,
-                biometric.high_hr, biometric.low_hr, biometric.notes
-            ))
-        
-        row = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return Biometrics(
-            biometric_id=row[0],
-            user_id=row[1],
-            date=str(row[2]),
-            weight=float(row[3]) if row[3] is not None else None,
-            weight_units=row[4],
-            avg_hr=row[5],
-            high_hr=row[6],
-            low_hr=row[7],
-            notes=row[8]
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-def calculate_calories_burned(activity_type: str, weight_kg: float, time_hours: float) -> int:
-    """Calculate calories burned using MET values and user weight"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get MET value for the activity type
-        cursor.execute("""
-            SELECT avg_met_value FROM exercise_definitions 
-            WHERE LOWER(exercise_name) = LOWER(%s)
-        """, (activity_type,))
-        
-        met_row = cursor.fetchone()
-        if met_row:
-            met_value = float(met_row[0])
-        else:
-            # Default to Miscellaneous if no match found
-            cursor.execute("SELECT avg_met_value FROM exercise_definitions WHERE exercise_name = 'Miscellaneous'")
-            met_row = cursor.fetchone()
-            met_value = float(met_row[0]) if met_row else 2.0
-        
-        cursor.close()
-        conn.close()
-        
-        # Calculate calories: MET × weight (kg) × time (hours)
-        calories = int(met_value * weight_kg * time_hours)
-        return calories
-        
-    except Exception as e:
-        # Fallback calculation if database lookup fails
-        return int(2.0 * weight_kg * time_hours)  # Default MET of 2.0
-
-def get_user_weight_kg(user_id: int, activity_date: str) -> float:
-    """Get user's weight in kg for a given date"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get the most recent weight entry for the user on or before the activity date
-        cursor.execute("""
-            SELECT weight, weight_units FROM biometrics 
-            WHERE user_id = %s AND date <= %s 
-            ORDER BY date DESC 
-            LIMIT 1
-        """, (user_id, activity_date))
-        
-        weight_row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if weight_row and weight_row[0]:
-            weight = float(weight_row[0])
-            weight_units = weight_row[1] if weight_row[1] else 'lbs'
-            
-            # Convert to kg if needed
-            if weight_units.lower() in ['lbs', 'lb', 'pounds']:
-                return weight * 0.453592  # Convert lbs to kg
-            elif weight_units.lower() in ['kg', 'kilograms']:
-                return weight
-            else:
-                return weight  # Assume kg if units unknown
-        
-        return 70.0  # Default weight in kg if no data found
-        
-    except Exception as e:
-        return 70.0  # Default weight in kg if error occurs
-
-def get_user_latest_weight(user_id: int) -> dict:
-    """Get the most recent weight entry for a user with full details"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get the most recent weight entry for the user
-        cursor.execute("""
-            SELECT weight, weight_units, date, notes 
-            FROM biometrics 
-            WHERE user_id = %s AND weight IS NOT NULL 
-            ORDER BY date DESC 
-            LIMIT 1
-        """, (user_id,))
-        
-        weight_row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if weight_row and weight_row[0]:
-            weight = float(weight_row[0])
-            weight_units = weight_row[1] if weight_row[1] else 'lbs'
-            date = str(weight_row[2])
-            notes = weight_row[3]
-            
-            # Convert to kg for calculations
-            weight_kg = weight
-            if weight_units.lower() in ['lbs', 'lb', 'pounds']:
-                weight_kg = weight * 0.453592
-            
-            return {
-                "weight": weight,
-                "weight_units": weight_units,
-                "weight_kg": round(weight_kg, 2),
-                "date": date,
-                "notes": notes,
-                "found": True
-            }
-        
-        return {
-            "weight": None,
-            "weight_units": None,
-            "weight_kg": None,
-            "date": None,
-            "notes": None,
-            "found": False
-        }
-        
-    except Exception as e:
-        return {
-            "weight": None,
-            "weight_units": None,
-            "weight_kg": None,
-            "date": None,
-            "notes": None,
-            "found": False,
-            "error": str(e)
-        }
-
-# Exercise Definitions endpoints
-@app.get("/exercise-definitions", response_model=List[ExerciseDefinition])
-async def get_exercise_definitions():
-    """Get all exercise definitions"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT exercise_id, exercise_name, avg_met_value 
-        FROM exercise_definitions ORDER BY exercise_id
-    """)
-    exercise_definitions = []
-    for row in cursor.fetchall():
-        exercise_definitions.append(ExerciseDefinition(
-            exercise_id=row[0],
-            exercise_name=row[1],
-            avg_met_value=float(row[2])
-        ))
-    cursor.close()
-    conn.close()
-    return exercise_definitions
-
-@app.get("/exercise-definitions/{exercise_id}", response_model=ExerciseDefinition)
-async def get_exercise_definition(exercise_id: int):
-    """Get a specific exercise definition"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT exercise_id, exercise_name, avg_met_value 
-        FROM exercise_definitions WHERE exercise_id = %s
-    """, (exercise_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if row:
-        return ExerciseDefinition(
-            exercise_id=row[0],
-            exercise_name=row[1],
-            avg_met_value=float(row[2])
-        )
-    return {"error": "Exercise definition not found"}
-
-@app.post("/exercise-definitions", response_model=ExerciseDefinition)
-async def create_exercise_definition(exercise_definition: ExerciseDefinition):
-    """Create a new exercise definition in the database"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO exercise_definitions (exercise_name, avg_met_value) 
-            VALUES (%s, %s) 
-            RETURNING exercise_id, exercise_name, avg_met_value
-        """, (
-            exercise_definition.exercise_name,
-            exercise_definition.avg_met_value
-        ))
-        row = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return ExerciseDefinition(
-            exercise_id=row[0],
-            exercise_name=row[1],
-            avg_met_value=float(row[2])
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-# Recipes endpoints
-@app.get("/recipes", response_model=List[Recipe])
-async def get_recipes(recipe_type: Optional[str] = None, extra_categories: Optional[str] = None):
-    """Get all recipes, optionally filtered by type or category"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    if recipe_type and extra_categories:
-        cursor.execute("""
-            SELECT recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
-                   recipe_url, ingredients, instructions, directions, calories, 
-                   fat, carbs, protein, extra_categories 
-            FROM recipes 
-            WHERE recipe_type = %s AND extra_categories = %s 
-            ORDER BY recipe_name
-        """, (recipe_type, extra_categories))
-    elif recipe_type:
-        cursor.execute("""
-            SELECT recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
-                   recipe_url, ingredients, instructions, directions, calories, 
-                   fat, carbs, protein, extra_categories 
-            FROM recipes 
-            WHERE recipe_type = %s 
-            ORDER BY recipe_name
-        """, (recipe_type,))
-    elif extra_categories:
-        cursor.execute("""
-            SELECT recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
-                   recipe_url, ingredients, instructions, directions, calories, 
-                   fat, carbs, protein, extra_categories 
-            FROM recipes 
-            WHERE extra_categories = %s 
-            ORDER BY recipe_name
-        """, (extra_categories,))
-    else:
-        cursor.execute("""
-            SELECT recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
-                   recipe_url, ingredients, instructions, directions, calories, 
-                   fat, carbs, protein, extra_categories 
-            FROM recipes 
-            ORDER BY recipe_name
-        """)
-    
-    recipes = []
-    for row in cursor.fetchall():
-        recipes.append(Recipe(
-            recipe_id=row[0],
-            recipe_name=row[1],
-            recipe_type=row[2],
-            recipe_source=row[3],
-            source_user_id=row[4],
-            recipe_url=row[5],
-            ingredients=row[6],
-            instructions=row[7],
-            directions=row[8],
-            calories=row[9],
-            fat=float(row[10]) if row[10] is not None else None,
-            carbs=float(row[11]) if row[11] is not None else None,
-            protein=float(row[12]) if row[12] is not None else None,
-            extra_categories=row[13]
-        ))
-    cursor.close()
-    conn.close()
-    return recipes
-
-@app.get("/recipes/{recipe_id}", response_model=Recipe)
-async def get_recipe(recipe_id: int):
-    """Get a specific recipe"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
-               recipe_url, ingredients, instructions, directions, calories, 
-               fat, carbs, protein, extra_categories 
-        FROM recipes WHERE recipe_id = %s
-    """, (recipe_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if row:
-        return Recipe(
-            recipe_id=row[0],
-            recipe_name=row[1],
-            recipe_type=row[2],
-            recipe_source=row[3],
-            source_user_id=row[4],
-            recipe_url=row[5],
-            ingredients=row[6],
-            instructions=row[7],
-            directions=row[8],
-            calories=row[9],
-            fat=float(row[10]) if row[10] is not None else None,
-            carbs=float(row[11]) if row[11] is not None else None,
-            protein=float(row[12]) if row[12] is not None else None,
-            extra_categories=row[13]
-        )
-    return {"error": "Recipe not found"}
-
-@app.post("/recipes", response_model=Recipe)
-async def create_recipe(recipe: Recipe):
-    """Create a new recipe in the database"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO recipes (recipe_name, recipe_type, recipe_source, source_user_id, 
-                               recipe_url, ingredients, instructions, directions, 
-                               calories, fat, carbs, protein, extra_categories) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
-            RETURNING recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
-                     recipe_url, ingredients, instructions, directions, calories, 
-                     fat, carbs, protein, extra_categories
-        """, (
-            recipe.recipe_name, recipe.recipe_type, recipe.recipe_source, recipe.source_user_id,
-            recipe.recipe_url, recipe.ingredients, recipe.instructions, recipe.directions,
-            recipe.calories, recipe.fat, recipe.carbs, recipe.protein, recipe.extra_categories
-        ))
-        row = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return Recipe(
-            recipe_id=row[0],
-            recipe_name=row[1],
-            recipe_type=row[2],
-            recipe_source=row[3],
-            source_user_id=row[4],
-            recipe_url=row[5],
-            ingredients=row[6],
-            instructions=row[7],
-            directions=row[8],
-            calories=row[9],
-            fat=float(row[10]) if row[10] is not None else None,
-            carbs=float(row[11]) if row[11] is not None else None,
-            protein=float(row[12]) if row[12] is not None else None,
-            extra_categories=row[13]
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-@app.post("/generate-recipe")
-async def generate_recipe(request: RecipeGenerationRequest):
-    """Generate a recipe using GPT based on user directions and save it to the database"""
-    try:
-        # Validate that the user exists
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM users WHERE id = %s", (request.user_id,))
-        user_exists = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not user_exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Generate and save the recipe
-        result = generate_and_save_recipe(
-            user_directions=request.user_directions,
-            user_id=request.user_id,
-            model=request.model
-        )
-        
-        if result["success"]:
-            return {
-                "success": True,
-                "message": result["message"],
-                "recipe": result["recipe"]
-            }
-        else:
-            raise HTTPException(status_code=500, detail=result["error"])
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Recipe generation failed: {str(e)}")
-
-# Simple Strava integration endpoint (placeholder)
-@app.get("/strava/connect")
-async def connect_strava():
-    """Placeholder for Strava connection"""
-    return {
-        "message": "Strava integration coming soon!",
-        "client_id": os.getenv("STRAVA_CLIENT_ID", "not configured")
-    }
-
-@app.post("/load-activity-data")
-async def load_activity_data():
-    """Load sample activity data from CSV file into the database. This endpoint loads sample/demo fitness activity data for testing and development purposes."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Read CSV file
-        csv_file_path = "fakeData/activityData.csv"
-        activities_loaded = 0
-        
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                # Parse date
-                activity_date = datetime.strptime(row['activity_date'], '%m/%d/%Y').date()
-                
-                # Insert activity using the user_id from CSV (let database auto-generate activity_id)
-                cursor.execute("""
-                    INSERT INTO activities (
-                        user_id, activity_date, activity_type, 
-                        distance, distance_units, time, time_units, 
-                        speed, speed_units, calories_burned
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    int(row['user_id']),
-                    activity_date,
-                    row['activity_type'],
-                    float(row['distance']) if row['distance'] else None,
-                    row['distance_units'],
-                    float(row['time']) if row['time'] else None,
-                    row['time_units'],
-                    float(row['speed']) if row['speed'] else None,
-                    row['speed_units'],
-                    int(row['calories_burned']) if row['calories_burned'] else None
-                ))
-                activities_loaded += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            "success": True,
-            "message": f"Successfully loaded {activities_loaded} sample activities",
-            "activities_loaded": activities_loaded,
-            "note": "This is sample/demo data for testing purposes"
-        }
-        
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="CSV file not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
-
-@app.post("/load-user-data")
-async def load_user_data():
-    """Load sample user data from CSV file into the database. This endpoint loads sample/demo user data for testing and development purposes."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Read CSV file
-        csv_file_path = "fakeData/userData.csv"
-        users_loaded = 0
-        
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                # Skip if user already exists by email
-                cursor.execute("SELECT id FROM users WHERE email = %s", (row['email'],))
-                if cursor.fetchone():
-                    continue
-
-                # Insert user with auto-generated id
-                cursor.execute("""
-                    INSERT INTO users (name, email, password) 
-                    VALUES (%s, %s, %s)
-                """, (
-                    row['name'],
-                    row['email'],
-                    row['password']
-                ))
-                users_loaded += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            "success": True,
-            "message": f"Successfully loaded {users_loaded} sample users",
-            "users_loaded": users_loaded,
-            "note": "This is sample/demo data for testing purposes"
-        }
-        
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="CSV file not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
-
-@app.post("/load-biometric-data")
-async def load_biometric_data():
-    """Load sample biometric data from CSV file into the database. This endpoint loads sample/demo health metrics data for testing and development purposes."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Read CSV file
-        csv_file_path = "fakeData/biometricData.csv"
-        biometrics_loaded = 0
-        
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                # Parse date
-                biometric_date = datetime.strptime(row['date'], '%m/%d/%Y').date()
-                
-                # Insert biometric using the user_id from CSV (let database auto-generate biometric_id)
-                cursor.execute("""
-                    INSERT INTO biometrics (
-                        user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    int(row['user_id']),
-                    biometric_date,
-                    float(row['weight']) if row['weight'] else None,
-                    row['weight_units'],
-                    int(row['avg_hr']) if row['avg_hr'] else None,
-                    int(row['high_hr']) if row['high_hr'] else None,
-                    int(row['low_hr']) if row['low_hr'] else None,
-                    row['notes']
-                ))
-                biometrics_loaded += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            "success": True,
-            "message": f"Successfully loaded {biometrics_loaded} sample biometric entries",
-            "biometrics_loaded": biometrics_loaded,
-            "note": "This is sample/demo data for testing purposes"
-        }
-        
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="CSV file not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
-
-@app.post("/load-test-data")
-async def load_test_data():
-    """Load all sample data from CSV files into the database (users, activities, biometrics, exercise definitions, recipes). This endpoint loads sample/demo data for testing and development purposes."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        results = {
-            "users_loaded": 0,
-            "activities_loaded": 0,
-            "biometrics_loaded": 0,
-            "exercise_definitions_loaded": 0,
-            "recipes_loaded": 0,
-            "errors": []
-        }
-        
-        # Load users first (since activities and biometrics reference user_id)
-        try:
-            csv_file_path = "fakeData/userData.csv"
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                
-                for row in csv_reader:
-                    # Insert user (let database auto-generate id)
-                    cursor.execute("""
-                        INSERT INTO users (name, email, weight_goal, password) 
-                        VALUES (%s, %s, %s, %s)
-                    """, (
-                        row['name'],
-                        row['email'],
-                        row['weight_goal'] if 'weight_goal' in row and row['weight_goal'] else None,
-                        row['password']
-                    ))
-                    results["users_loaded"] += 1
-        except FileNotFoundError:
-            results["errors"].append("userData.csv not found")
-        except Exception as e:
-            results["errors"].append(f"Error loading users: {str(e)}")
-        
-        # Load activities
-        try:
-            csv_file_path = "fakeData/activityData.csv"
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                
-                for row in csv_reader:
-                    # Parse date
-                    activity_date = datetime.strptime(row['activity_date'], '%m/%d/%Y').date()
-                    
-                    # Insert activity (let database auto-generate activity_id)
-                    cursor.execute("""
-                        INSERT INTO activities (
-                            user_id, activity_date, activity_type, 
-                            distance, distance_units, time, time_units, 
-                            speed, speed_units, calories_burned
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        int(row['user_id']),
-                        activity_date,
-                        row['activity_type'],
-                        float(row['distance']) if row['distance'] else None,
-                        row['distance_units'],
-                        float(row['time']) if row['time'] else None,
-                        row['time_units'],
-                        float(row['speed']) if row['speed'] else None,
-                        row['speed_units'],
-                        int(row['calories_burned']) if row['calories_burned'] else None
-                    ))
-                    results["activities_loaded"] += 1
-        except FileNotFoundError:
-            results["errors"].append("activityData.csv not found")
-        except Exception as e:
-            results["errors"].append(f"Error loading activities: {str(e)}")
-        
-        # Load biometrics
-        try:
-            csv_file_path = "fakeData/biometricData.csv"
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                
-                for row in csv_reader:
-                    # Parse date
-                    biometric_date = datetime.strptime(row['date'], '%m/%d/%Y').date()
-                    
-                    # Insert biometric (let database auto-generate biometric_id)
-                    cursor.execute("""
-                        INSERT INTO biometrics (
-                            user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        int(row['user_id']),
-                        biometric_date,
-                        float(row['weight']) if row['weight'] else None,
-                        row['weight_units'],
-                        int(row['avg_hr']) if row['avg_hr'] else None,
-                        int(row['high_hr']) if row['high_hr'] else None,
-                        int(row['low_hr']) if row['low_hr'] else None,
-                        row['notes']
-                    ))
-                    results["biometrics_loaded"] += 1
-        except FileNotFoundError:
-            results["errors"].append("biometricData.csv not found")
-        except Exception as e:
-            results["errors"].append(f"Error loading biometrics: {str(e)}")
-        
-        # Load exercise definitions
-        try:
-            csv_file_path = "fakeData/exerciseDefinitions.csv"
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                
-                for row in csv_reader:
-                    # Insert exercise definition (let database auto-generate exercise_id)
-                    cursor.execute("""
-                        INSERT INTO exercise_definitions (
-                            exercise_name, avg_met_value
-                        ) VALUES (%s, %s)
-                    """, (
-                        row['exercise_name'],
-                        float(row['avg_met_value'])
-                    ))
-                    results["exercise_definitions_loaded"] += 1
-        except FileNotFoundError:
-            results["errors"].append("exerciseDefinitions.csv not found")
-        except Exception as e:
-            results["errors"].append(f"Error loading exercise definitions: {str(e)}")
-        
-        # Load recipes
-        try:
-            csv_file_path = "fakeData/recipeData.csv"
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                
-                for row in csv_reader:
-                    # Insert recipe (let database auto-generate recipe_id)
-                    cursor.execute("""
-                        INSERT INTO recipes (
-                            recipe_name, recipe_type, recipe_source, source_user_id,
-                            recipe_url, ingredients, instructions, directions, calories,
-                            fat, carbs, protein, extra_categories
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        row['recipe_name'],
-                        row['recipe_type'] if row['recipe_type'] else None,
-                        row['recipe_source'] if row['recipe_source'] else None,
-                        int(row['source_user_id']) if row['source_user_id'] else None,
-                        row['recipe_url'] if row['recipe_url'] else None,
-                        row['ingredients'] if row['ingredients'] else None,
-                        row['instructions'] if row['instructions'] else None,
-                        row['directions'] if row['directions'] else None,
-                        int(row['calories']) if row['calories'] else None,
-                        float(row['fat']) if row['fat'] else None,
-                        float(row['carbs']) if row['carbs'] else None,
-                        float(row['protein']) if row['protein'] else None,
-                        row['extra_categories'] if row['extra_categories'] else None
-                    ))
-                    results["recipes_loaded"] += 1
-        except FileNotFoundError:
-            results["errors"].append("recipeData.csv not found")
-        except Exception as e:
-            results["errors"].append(f"Error loading recipes: {str(e)}")
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        # Determine success status
-        total_loaded = results["users_loaded"] + results["activities_loaded"] + results["biometrics_loaded"] + results["exercise_definitions_loaded"] + results["recipes_loaded"]
-        success = len(results["errors"]) == 0
-        
-        return {
-            "success": success,
-            "message": f"Loaded {total_loaded} total sample records",
-            "details": results,
-            "note": "This is sample/demo data for testing purposes"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
-
-@app.post("/load-exercise-definitions")
-async def load_exercise_definitions():
-    """Load exercise definitions from CSV file into the database. This endpoint loads exercise types and their MET values for calorie calculations."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Read CSV file
-        csv_file_path = "fakeData/exerciseDefinitions.csv"
-        definitions_loaded = 0
-        
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                # Insert exercise definition (let database auto-generate exercise_id)
-                cursor.execute("""
-                    INSERT INTO exercise_definitions (
-                        exercise_name, avg_met_value
-                    ) VALUES (%s, %s)
-                """, (
-                    row['exercise_name'],
-                    float(row['avg_met_value'])
-                ))
-                definitions_loaded += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            "success": True,
-            "message": f"Successfully loaded {definitions_loaded} exercise definitions",
-            "definitions_loaded": definitions_loaded,
-            "note": "Exercise definitions loaded for calorie calculations"
-        }
-        
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="CSV file not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
-
-@app.post("/load-recipe-data")
-async def load_recipe_data():
-    """Load sample recipe data from CSV file into the database. This endpoint loads sample/demo recipe data for testing and development purposes."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Read CSV file
-        csv_file_path = "fakeData/recipeData.csv"
-        recipes_loaded = 0
-        
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                # Insert recipe (let database auto-generate recipe_id)
-                cursor.execute("""
-                    INSERT INTO recipes (
-                        recipe_name, recipe_type, recipe_source, source_user_id,
-                        recipe_url, ingredients, instructions, directions, calories,
-                        fat, carbs, protein, extra_categories
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    row['recipe_name'],
-                    row['recipe_type'] if row['recipe_type'] else None,
-                    row['recipe_source'] if row['recipe_source'] else None,
-                    int(row['source_user_id']) if row['source_user_id'] else None,
-                    row['recipe_url'] if row['recipe_url'] else None,
-                    row['ingredients'] if row['ingredients'] else None,
-                    row['instructions'] if row['instructions'] else None,
-                    row['directions'] if row['directions'] else None,
-                    int(row['calories']) if row['calories'] else None,
-                    float(row['fat']) if row['fat'] else None,
-                    float(row['carbs']) if row['carbs'] else None,
-                    float(row['protein']) if row['protein'] else None,
-                    row['extra_categories'] if row['extra_categories'] else None
-                ))
-                recipes_loaded += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            "success": True,
-            "message": f"Successfully loaded {recipes_loaded} sample recipes",
-            "recipes_loaded": recipes_loaded,
-            "note": "This is sample/demo data for testing purposes"
-        }
-        
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="CSV file not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
-
-if __name__ == "__main__":
-    import uvicorn
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from typing import List, Optional
+import os
+import anyio.to_thread
+from dotenv import load_dotenv
+from db_connection import test_gcp_postgres_connection, get_connection_info, initialize_database, pooled_connection, get_pool, close_pool, get_pool_stats
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import io
+import json
+from datetime import datetime, date
+from decimal import Decimal
+from recipe_generation import generate_and_save_recipe, generation_flights, stream_and_save_recipe, generate_and_save_recipes
+from recipe_cache import get_recipe_cache
+from recipe_jobs import recipe_job_queue, QueueFullError
+from bulk_loader import load_sample_data, BIOMETRICS_ON_CONFLICT
+from csv_import import import_csv_upload, start_import, parse_date, imports
+from psycopg2.extras import execute_values
+from migrations import get_migration_status, check_index_usage
+from pagination import page_size, decode_cursor, paginate, NEXT_CURSOR_HEADER
+from streaming import check_stream_format, stream_query
+from serialization import RowShape, rows_response, FastJSONResponse
+from met_cache import met_cache, DEFAULT_MET_VALUE
+from calories import (weight_to_kg, fill_default_weights, seconds_to_hours, calories_burned, SECONDS_PER_HOUR,
+                      DEFAULT_WEIGHT_KG)
+import units
+from units import backfill_all
+from weight_cache import weight_cache, WEIGHT_AS_OF_SQL, BATCH_WEIGHT_SQL
+from recipe_search import search_clauses, reset_trigram_check, parse_tags, NUTRITION_COLUMNS, RECIPE_SORTS
+from recommendations import recipe_matrix, nutrition_targets, recommend
+from meal_plan import plan_meals, MEAL_PLAN_MAX_DAYS
+import numpy as np
+
+# Load environment variables
+load_dotenv()
+
+# Create FastAPI app
+app = FastAPI(
+    title="Fitness API",
+    description="A simple fitness tracking API",
+    version="1.0.0"
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Allow all origins for development
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # Let browser clients read the pagination cursor
+)
+
+@app.on_event("startup")
+async def startup():
+    """Size the worker thread pool and warm up the database connection pool"""
+    # Endpoints that talk to the database are plain (sync) functions, which FastAPI runs
+    # in a bounded thread pool so blocking psycopg2 calls never stall the event loop.
+    # Keep it at least as large as the connection pool so every connection can be used.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = int(os.getenv('API_THREADPOOL_SIZE', max(40, get_pool().max_size)))
+    try:
+        get_pool().open()
+    except Exception as e:
+        # The API can still start; connections are retried lazily on first use
+        print(f"Connection pool warm-up failed: {str(e)}")
+    await recipe_job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers and close pooled database connections"""
+    await recipe_job_queue.stop()
+    close_pool()
+
+# Simple data models
+class User(BaseModel):
+    id: Optional[int] = None
+    name: str
+    email: str
+    weight_goal: Optional[str] = None
+    password: Optional[str] = None
+
+class Activity(BaseModel):
+    activity_id: Optional[int] = None
+    user_id: int
+    activity_type: str
+    distance: Optional[float] = None
+    distance_units: Optional[str] = None
+    time: Optional[float] = None
+    time_units: Optional[str] = None
+    speed: Optional[float] = None
+    speed_units: Optional[str] = None
+    calories_burned: Optional[int] = None
+    activity_date: str
+
+class Biometrics(BaseModel):
+    biometric_id: Optional[int] = None
+    user_id: int
+    date: str
+    weight: Optional[float] = None
+    weight_units: Optional[str] = None
+    avg_hr: Optional[int] = None
+    high_hr: Optional[int] = None
+    low_hr: Optional[int] = None
+    notes: Optional[str] = None
+
+class ExerciseDefinition(BaseModel):
+    exercise_id: Optional[int] = None
+    exercise_name: str
+    avg_met_value: float
+
+class Recipe(BaseModel):
+    recipe_id: Optional[int] = None
+    recipe_name: str
+    recipe_type: Optional[str] = None
+    recipe_source: Optional[str] = None
+    source_user_id: Optional[int] = None
+    recipe_url: Optional[str] = None
+    ingredients: Optional[str] = None
+    instructions: Optional[str] = None
+    directions: Optional[str] = None
+    calories: Optional[int] = None
+    fat: Optional[float] = None
+    carbs: Optional[float] = None
+    protein: Optional[float] = None
+    extra_categories: Optional[str] = None
+
+class RecipeGenerationRequest(BaseModel):
+    user_id: int
+    user_directions: str
+    model: Optional[str] = "gpt-3.5-turbo"
+
+class BatchRecipeGenerationRequest(BaseModel):
+    user_id: int
+    directions: List[str]
+    model: Optional[str] = "gpt-3.5-turbo"
+
+class BatchActivityRequest(BaseModel):
+    activities: List[Activity]
+
+class BatchBiometricRequest(BaseModel):
+    biometrics: List[Biometrics]
+
+class LoginRequest(BaseModel):
+    email: str
+    password: str
+
+# Basic endpoints
+@app.get("/")
+async def root():
+    """Root endpoint"""
+    return {"message": "Fitness API is running!", "version": "1.0.0"}
+
+@app.get("/health")
+def health_check():
+    """Health check endpoint for Docker and load balancers"""
+    try:
+        # Test database connection
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "pool": get_pool_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "status": "unhealthy", 
+            "database": "disconnected",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+
+
+@app.get("/test-connection")
+def test_connection():
+    """Test GCP PostgreSQL connection"""
+    return test_gcp_postgres_connection()
+
+@app.get("/connection-info")
+async def get_db_info():
+    """Get database connection information (without testing)"""
+    return get_connection_info()
+
+@app.get("/pool-stats")
+async def pool_stats():
+    """Get database connection pool statistics"""
+    return get_pool_stats()
+
+@app.post("/init-database")
+def init_database():
+    """Initialize database tables"""
+    result = initialize_database()
+    # Migration 6 may have just installed pg_trgm
+    reset_trigram_check()
+    return result
+
+@app.get("/migrations")
+def migration_status():
+    """List applied and pending schema migrations"""
+    try:
+        return get_migration_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read migration status: {str(e)}")
+
+@app.post("/backfill/canonical-units")
+def backfill_canonical_units_endpoint():
+    """Fill canonical unit columns (time_seconds, distance_meters, weight_kg) for rows written before they existed, in committed batches"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            result = backfill_all(cursor)
+            cursor.close()
+        weight_cache.clear()
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backfill failed: {str(e)}")
+
+@app.get("/migrations/index-check")
+def index_check():
+    """EXPLAIN the hot queries and report whether each uses its expected index"""
+    try:
+        checks = check_index_usage()
+        return {"success": all(check["ok"] for check in checks), "checks": checks}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index check failed: {str(e)}")
+
+@app.post("/login")
+def login(login_request: LoginRequest):
+    """Attempt to login with email and password"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+        
+            # Check if user exists with the provided email and password
+            cursor.execute("""
+                SELECT id, name, email, weight_goal 
+                FROM users 
+                WHERE email = %s AND password = %s
+            """, (login_request.email, login_request.password))
+        
+            user_row = cursor.fetchone()
+            cursor.close()
+        
+        if user_row:
+            return {
+                "success": True,
+                "message": "Login successful",
+                "user": {
+                    "id": user_row[0],
+                    "name": user_row[1],
+                    "email": user_row[2],
+                    "weight_goal": user_row[3]
+                }
+            }
+        else:
+            return {
+                "success": False,
+                "message": "Invalid email or password"
+            }
+            
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
+
+# User endpoints
+USER_SHAPE = RowShape([
+    ("id", "id"),
+    ("name", "name"),
+    ("email", "email"),
+    ("weight_goal", "weight_goal"),
+    ("password", "password")
+])
+
+@app.get("/users", response_model=List[User])
+def get_users(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get users ordered by id, one page at a time (next page cursor in the X-Next-Cursor header)"""
+    size = page_size(limit)
+    after_id = decode_cursor(cursor, [int])[0] if cursor else None
+    with pooled_connection() as conn:
+        db_cursor = conn.cursor()
+        if after_id is not None:
+            db_cursor.execute(
+                f"SELECT {USER_SHAPE.sql} FROM users WHERE id > %s ORDER BY id LIMIT %s",
+                (after_id, size + 1)
+            )
+        else:
+            db_cursor.execute(f"SELECT {USER_SHAPE.sql} FROM users ORDER BY id LIMIT %s", (size + 1,))
+        rows = paginate(db_cursor.fetchall(), size, response, lambda row: [row[0]])
+        db_cursor.close()
+    return rows_response(USER_SHAPE, rows, response)
+
+@app.get("/users/{user_id}", response_model=User)
+def get_user(user_id: int):
+    """Get a specific user"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, email, weight_goal, password FROM users WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    if row:
+        return User(id=row[0], name=row[1], email=row[2], weight_goal=row[3], password=row[4])
+    return {"error": "User not found"}
+
+@app.post("/users", response_model=User)
+def create_user(user: User):
+    """Create a new user in the database"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO users (name, email, weight_goal, password) VALUES (%s, %s, %s, %s) RETURNING id, name, email, weight_goal, password, created_at",
+                (user.name, user.email, user.weight_goal, user.password)
+            )
+            row = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+        return User(id=row[0], name=row[1], email=row[2], weight_goal=row[3], password=row[4])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/users/{user_id}/latest-weight")
+def get_user_latest_weight_endpoint(user_id: int):
+    """Get the most recent weight entry for a specific user"""
+    return get_user_latest_weight(user_id)
+
+# Activity endpoints
+ACTIVITY_SHAPE = RowShape([
+    ("activity_id", "activity_id"),
+    ("user_id", "user_id"),
+    ("activity_type", "activity_type"),
+    ("distance", "distance::float8"),
+    ("distance_units", "distance_units"),
+    ("time", "time::float8"),
+    ("time_units", "time_units"),
+    ("speed", "speed::float8"),
+    ("speed_units", "speed_units"),
+    ("calories_burned", "calories_burned"),
+    ("activity_date", "activity_date")
+])
+
+@app.get("/activities", response_model=List[Activity])
+def get_activities(response: Response, user_id: Optional[int] = None, limit: Optional[int] = None,
+                   cursor: Optional[str] = None, stream: Optional[str] = None):
+    """
+    Get activities newest first, optionally filtered by user, one page at a time (next page cursor in the X-Next-Cursor header).
+    With stream=ndjson or stream=json every matching row (after cursor, if given) is streamed instead of one page.
+    """
+    check_stream_format(stream)
+    size = page_size(limit)
+    conditions = []
+    params = []
+    if user_id:
+        conditions.append("user_id = %s")
+        params.append(user_id)
+    if cursor:
+        conditions.append("(activity_date, activity_id) < (%s, %s)")
+        params.extend(decode_cursor(cursor, [date, int]))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+        SELECT {ACTIVITY_SHAPE.sql}
+        FROM activities {where}
+        ORDER BY activity_date DESC, activity_id DESC
+    """
+    if stream:
+        return stream_query(sql, tuple(params), ACTIVITY_SHAPE.to_dict, stream)
+
+    with pooled_connection() as conn:
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql + " LIMIT %s", (*params, size + 1))
+        rows = paginate(db_cursor.fetchall(), size, response, lambda row: [row[10], row[0]])
+        db_cursor.close()
+    return rows_response(ACTIVITY_SHAPE, rows, response)
+
+@app.get("/activities/{activity_id}", response_model=Activity)
+def get_activity(activity_id: int):
+    """Get a specific activity"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT activity_id, user_id, activity_type, distance, distance_units, 
+                   time, time_units, speed, speed_units, calories_burned, activity_date 
+            FROM activities WHERE activity_id = %s
+        """, (activity_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    if row:
+        return Activity(
+            activity_id=row[0],
+            user_id=row[1],
+            activity_type=row[2],
+            distance=float(row[3]) if row[3] is not None else None,
+            distance_units=row[4],
+            time=float(row[5]) if row[5] is not None else None,
+            time_units=row[6],
+            speed=float(row[7]) if row[7] is not None else None,
+            speed_units=row[8],
+            calories_burned=row[9],
+            activity_date=str(row[10])
+        )
+    return {"error": "Activity not found"}
+
+def activity_values(activity: Activity, calories_burned: Optional[int], time_seconds: Optional[float]) -> tuple:
+    """Column values for inserting an activity, including the canonical time_seconds and distance_meters"""
+    return (
+        activity.user_id, activity.activity_type, activity.distance, activity.distance_units,
+        activity.time, activity.time_units, activity.speed, activity.speed_units,
+        calories_burned, activity.activity_date, time_seconds,
+        units.distance_meters(activity.distance, activity.distance_units)
+    )
+
+@app.post("/activities", response_model=Activity)
+def create_activity(activity: Activity):
+    """
+    Create a new activity in the database with automatic calorie calculation.
+    Weight and MET values come from in-process caches, so on a warm cache the insert is the only query.
+    """
+    try:
+        # Calculate calories burned automatically, from the same canonical duration that is stored
+        time_seconds = units.time_seconds(activity.time, activity.time_units)
+        calculated_calories = None
+        if activity.time and activity.activity_type:
+            weight_kg = get_user_weight_kg(activity.user_id, activity.activity_date)
+            time_hours = (time_seconds or 0.0) / SECONDS_PER_HOUR
+            calculated_calories = calculate_calories_burned(activity.activity_type, weight_kg, time_hours)
+        
+        # Use calculated calories if available, otherwise use provided calories
+        final_calories = calculated_calories if calculated_calories is not None else activity.calories_burned
+        
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                INSERT INTO activities (user_id, activity_type, distance, distance_units, 
+                                      time, time_units, speed, speed_units, calories_burned, activity_date,
+                                      time_seconds, distance_meters) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
+                RETURNING {ACTIVITY_SHAPE.sql}
+            """, activity_values(activity, final_calories, time_seconds))
+            row = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+        return Activity(**{**ACTIVITY_SHAPE.to_dict(row), "activity_date": str(row[10])})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/activities/batch")
+def create_activities_batch(request: BatchActivityRequest):
+    """
+    Create many activities in one transaction, with the same automatic calorie calculation as POST /activities.
+    Weights for every (user, date) pair come from one query, calories are computed as one vectorized
+    pass and the rows are written with a single multi-row INSERT. The batch is all-or-nothing.
+    """
+    max_batch_size = int(os.getenv('ACTIVITY_BATCH_MAX_SIZE', '1000'))
+    activities = request.activities
+    if not activities:
+        raise HTTPException(status_code=400, detail="activities must not be empty")
+    if len(activities) > max_batch_size:
+        raise HTTPException(status_code=400, detail=f"At most {max_batch_size} activities per batch")
+    
+    try:
+        # Only activities with a duration get calculated calories; the rest keep the provided value
+        calculate = [bool(activity.time and activity.activity_type) for activity in activities]
+        seconds = [units.time_seconds(activity.time, activity.time_units) for activity in activities]
+        pairs = sorted({(activity.user_id, activity.activity_date)
+                        for activity, needed in zip(activities, calculate) if needed})
+        
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            weight_by_pair = {}
+            if pairs:
+                cursor.execute(BATCH_WEIGHT_SQL, ([user_id for user_id, _ in pairs], [date for _, date in pairs]))
+                weight_by_pair = dict(zip(pairs, [row[0] for row in cursor.fetchall()]))
+            
+            calories = [activity.calories_burned for activity in activities]
+            indexes = [index for index, needed in enumerate(calculate) if needed]
+            if indexes:
+                selected = [activities[index] for index in indexes]
+                weights_kg = [weight_by_pair[(activity.user_id, activity.activity_date)] for activity in selected]
+                try:
+                    met_values = [met_cache.get_met_value(activity.activity_type) for activity in selected]
+                except Exception:
+                    met_values = [DEFAULT_MET_VALUE] * len(selected)
+                computed = calories_burned(
+                    np.array(met_values, dtype=np.float64),
+                    fill_default_weights(weights_kg),
+                    seconds_to_hours([seconds[index] for index in indexes])
+                )
+                for index, value in zip(indexes, computed.tolist()):
+                    calories[index] = value
+            
+            rows = execute_values(cursor, f"""
+                INSERT INTO activities (user_id, activity_type, distance, distance_units, 
+                                        time, time_units, speed, speed_units, calories_burned, activity_date,
+                                        time_seconds, distance_meters) 
+                VALUES %s
+                RETURNING {ACTIVITY_SHAPE.sql}
+            """, [activity_values(activity, calories[index], seconds[index]) for index, activity in enumerate(activities)],
+               page_size=len(activities), fetch=True)
+            conn.commit()
+            cursor.close()
+        
+        return FastJSONResponse({
+            "success": True,
+            "activities_created": len(rows),
+            "activities": ACTIVITY_SHAPE.to_dicts(rows)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Biometrics endpoints
+BIOMETRIC_SHAPE = RowShape([
+    ("biometric_id", "biometric_id"),
+    ("user_id", "user_id"),
+    ("date", "date"),
+    ("weight", "weight::float8"),
+    ("weight_units", "weight_units"),
+    ("avg_hr", "avg_hr"),
+    ("high_hr", "high_hr"),
+    ("low_hr", "low_hr"),
+    ("notes", "notes")
+])
+
+@app.get("/biometrics", response_model=List[Biometrics])
+def get_biometrics(response: Response, user_id: Optional[int] = None, limit: Optional[int] = None,
+                   cursor: Optional[str] = None, stream: Optional[str] = None):
+    """
+    Get biometrics newest first, optionally filtered by user, one page at a time (next page cursor in the X-Next-Cursor header).
+    With stream=ndjson or stream=json every matching row (after cursor, if given) is streamed instead of one page.
+    """
+    check_stream_format(stream)
+    size = page_size(limit)
+    conditions = []
+    params = []
+    if user_id:
+        conditions.append("user_id = %s")
+        params.append(user_id)
+    if cursor:
+        conditions.append("(date, biometric_id) < (%s, %s)")
+        params.extend(decode_cursor(cursor, [date, int]))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+        SELECT {BIOMETRIC_SHAPE.sql}
+        FROM biometrics {where}
+        ORDER BY date DESC, biometric_id DESC
+    """
+    if stream:
+        return stream_query(sql, tuple(params), BIOMETRIC_SHAPE.to_dict, stream)
+
+    with pooled_connection() as conn:
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql + " LIMIT %s", (*params, size + 1))
+        rows = paginate(db_cursor.fetchall(), size, response, lambda row: [row[2], row[0]])
+        db_cursor.close()
+    return rows_response(BIOMETRIC_SHAPE, rows, response)
+
+@app.get("/biometrics/{biometric_id}", response_model=Biometrics)
+def get_biometric(biometric_id: int):
+    """Get a specific biometric entry"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT biometric_id, user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes 
+            FROM biometrics WHERE biometric_id = %s
+        """, (biometric_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    if row:
+        return Biometrics(
+            biometric_id=row[0],
+            user_id=row[1],
+            date=str(row[2]),
+            weight=float(row[3]) if row[3] is not None else None,
+            weight_units=row[4],
+            avg_hr=row[5],
+            high_hr=row[6],
+            low_hr=row[7],
+            notes=row[8]
+        )
+    return {"error": "Biometric entry not found"}
+
+def biometric_values(biometric: Biometrics) -> tuple:
+    """Column values for inserting a Biometrics entry, in BIOMETRIC_INSERT_SQL order"""
+    return (
+        biometric.user_id, biometric.date, biometric.weight, biometric.weight_units, biometric.avg_hr,
+        biometric.high_hr, biometric.low_hr, biometric.notes, units.weight_kg(biometric.weight, biometric.weight_units)
+    )
+
+def dedupe_biometric_values(rows: List[tuple]) -> List[tuple]:
+    """Keep the last row for each (user_id, date): ON CONFLICT DO UPDATE cannot update a row twice in one statement"""
+    latest = {}
+    for row in rows:
+        try:
+            day = parse_date(str(row[1]))
+        except ValueError:
+            day = str(row[1])  # Left for Postgres to accept or reject
+        latest[(row[0], day)] = row
+    return list(latest.values())
+
+BIOMETRIC_INSERT_SQL = f"""
+    INSERT INTO biometrics (user_id, date, weight, weight_units, avg_hr, high_hr, low_hr, notes, weight_kg) 
+    VALUES %s
+    {BIOMETRICS_ON_CONFLICT}
+"""
+
+@app.post("/biometrics", response_model=Biometrics)
+def create_biometric(biometric: Biometrics):
+    """Create or update a biometric entry in the database (one per user per day) with a single upsert"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            row = execute_values(cursor, BIOMETRIC_INSERT_SQL + f" RETURNING {BIOMETRIC_SHAPE.sql}",
+                                 [biometric_values(biometric)], fetch=True)[0]
+            conn.commit()
+            cursor.close()
+        weight_cache.invalidate(biometric.user_id)
+        
+        return Biometrics(**{**BIOMETRIC_SHAPE.to_dict(row), "date": str(row[2])})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/biometrics/batch")
+def create_biometrics_batch(request: BatchBiometricRequest):
+    """
+    Create or update many biometric entries (e.g. a multi-day device upload) with one multi-row upsert.
+    When the batch has several entries for the same user and day, the last one wins. The batch is all-or-nothing.
+    """
+    max_batch_size = int(os.getenv('BIOMETRIC_BATCH_MAX_SIZE', '1000'))
+    if not request.biometrics:
+        raise HTTPException(status_code=400, detail="biometrics must not be empty")
+    if len(request.biometrics) > max_batch_size:
+        raise HTTPException(status_code=400, detail=f"At most {max_batch_size} biometric entries per batch")
+    
+    try:
+        values = dedupe_biometric_values([biometric_values(biometric) for biometric in request.biometrics])
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            rows = execute_values(cursor, BIOMETRIC_INSERT_SQL + f" RETURNING {BIOMETRIC_SHAPE.sql}",
+                                  values, page_size=len(values), fetch=True)
+            conn.commit()
+            cursor.close()
+        for user_id in {row[0] for row in values}:
+            weight_cache.invalidate(user_id)
+        
+        return FastJSONResponse({
+            "success": True,
+            "biometrics_saved": len(rows),
+            "biometrics": BIOMETRIC_SHAPE.to_dicts(rows)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def calculate_calories_burned(activity_type: str, weight_kg: float, time_hours: float) -> int:
+    """Calculate calories burned using MET values (from the in-process MET cache) and user weight"""
+    try:
+        met_value = met_cache.get_met_value(activity_type)
+        
+        # Calculate calories: MET × weight (kg) × time (hours)
+        calories = int(met_value * weight_kg * time_hours)
+        return calories
+        
+    except Exception as e:
+        # Fallback calculation if database lookup fails
+        return int(DEFAULT_MET_VALUE * weight_kg * time_hours)
+
+def get_user_weight_kg(user_id: int, activity_date: str) -> float:
+    """Get user's weight in kg for a given date (the most recent entry on or before it), from the weight cache"""
+    try:
+        try:
+            day = datetime.strptime(parse_date(str(activity_date)), '%Y-%m-%d').date()
+        except ValueError:
+            day = None
+        
+        if day is not None:
+            entry = weight_cache.get(user_id).as_of(day)
+            weight_row = (entry[1], entry[2], entry[4]) if entry else None
+        else:
+            # Date formats parse_date does not know are left to Postgres
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(WEIGHT_AS_OF_SQL, (user_id, activity_date))
+                weight_row = cursor.fetchone()
+                cursor.close()
+        
+        if weight_row and weight_row[0]:
+            # Canonical weight_kg is set on write; rows not yet backfilled are converted here
+            return weight_row[2] if weight_row[2] is not None else weight_to_kg(weight_row[0], weight_row[1])
+        
+        return DEFAULT_WEIGHT_KG  # Default weight in kg if no data found
+        
+    except Exception as e:
+        return DEFAULT_WEIGHT_KG  # Default weight in kg if error occurs
+
+def get_user_latest_weight(user_id: int) -> dict:
+    """Get the most recent weight entry for a user with full details"""
+    try:
+        # Get the most recent weight entry for the user
+        weight_row = weight_cache.get(user_id).latest_weight()
+        
+        if weight_row and weight_row[1]:
+            weight = float(weight_row[1])
+            weight_units = weight_row[2] if weight_row[2] else 'lbs'
+            date = str(weight_row[0])
+            notes = weight_row[3]
+            
+            # Convert to kg for calculations
+            weight_kg = weight_row[4] if weight_row[4] is not None else weight_to_kg(weight, weight_units)
+            
+            return {
+                "weight": weight,
+                "weight_units": weight_units,
+                "weight_kg": round(weight_kg, 2),
+                "date": date,
+                "notes": notes,
+                "found": True
+            }
+        
+        return {
+            "weight": None,
+            "weight_units": None,
+            "weight_kg": None,
+            "date": None,
+            "notes": None,
+            "found": False
+        }
+        
+    except Exception as e:
+        return {
+            "weight": None,
+            "weight_units": None,
+            "weight_kg": None,
+            "date": None,
+            "notes": None,
+            "found": False,
+            "error": str(e)
+        }
+
+# Exercise Definitions endpoints
+@app.get("/exercise-definitions", response_model=List[ExerciseDefinition])
+def get_exercise_definitions():
+    """Get all exercise definitions"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT exercise_id, exercise_name, avg_met_value 
+            FROM exercise_definitions ORDER BY exercise_id
+        """)
+        exercise_definitions = []
+        for row in cursor.fetchall():
+            exercise_definitions.append(ExerciseDefinition(
+                exercise_id=row[0],
+                exercise_name=row[1],
+                avg_met_value=float(row[2])
+            ))
+        cursor.close()
+    return exercise_definitions
+
+@app.get("/exercise-definitions/{exercise_id}", response_model=ExerciseDefinition)
+def get_exercise_definition(exercise_id: int):
+    """Get a specific exercise definition"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT exercise_id, exercise_name, avg_met_value 
+            FROM exercise_definitions WHERE exercise_id = %s
+        """, (exercise_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    if row:
+        return ExerciseDefinition(
+            exercise_id=row[0],
+            exercise_name=row[1],
+            avg_met_value=float(row[2])
+        )
+    return {"error": "Exercise definition not found"}
+
+@app.post("/exercise-definitions", response_model=ExerciseDefinition)
+def create_exercise_definition(exercise_definition: ExerciseDefinition):
+    """Create a new exercise definition in the database"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO exercise_definitions (exercise_name, avg_met_value) 
+                VALUES (%s, %s) 
+                RETURNING exercise_id, exercise_name, avg_met_value
+            """, (
+                exercise_definition.exercise_name,
+                exercise_definition.avg_met_value
+            ))
+            row = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+        return ExerciseDefinition(
+            exercise_id=row[0],
+            exercise_name=row[1],
+            avg_met_value=float(row[2])
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        met_cache.invalidate()
+
+# Recipes endpoints
+RECIPE_SHAPE = RowShape([
+    ("recipe_id", "recipe_id"),
+    ("recipe_name", "recipe_name"),
+    ("recipe_type", "recipe_type"),
+    ("recipe_source", "recipe_source"),
+    ("source_user_id", "source_user_id"),
+    ("recipe_url", "recipe_url"),
+    ("ingredients", "ingredients"),
+    ("instructions", "instructions"),
+    ("directions", "directions"),
+    ("calories", "calories"),
+    ("fat", "fat::float8"),
+    ("carbs", "carbs::float8"),
+    ("protein", "protein::float8"),
+    ("extra_categories", "extra_categories")
+])
+
+@app.get("/recipes", response_model=List[Recipe])
+def get_recipes(response: Response, recipe_type: Optional[str] = None, extra_categories: Optional[str] = None,
+                tags_any: Optional[str] = None, tags_all: Optional[str] = None,
+                min_calories: Optional[float] = None, max_calories: Optional[float] = None,
+                min_fat: Optional[float] = None, max_fat: Optional[float] = None,
+                min_carbs: Optional[float] = None, max_carbs: Optional[float] = None,
+                min_protein: Optional[float] = None, max_protein: Optional[float] = None,
+                sort: str = 'name', order: str = 'asc',
+                search: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    Get recipes, optionally filtered by type, category or nutrition ranges, one page at a time (next page cursor in the X-Next-Cursor header).
+    Tag filters take comma-separated, case-insensitive tags: tags_any matches recipes with at least one of them,
+    tags_all (and extra_categories) recipes with every one of them.
+    sort is name, calories, protein or protein_per_calorie (order asc or desc); nutrition sorts leave out
+    recipes without that value.
+    With search, returns the best `limit` matches by relevance instead (not paginated).
+    """
+    size = page_size(limit)
+    if search is not None and not search.strip():
+        search = None
+    if search and cursor:
+        raise HTTPException(status_code=400, detail="cursor cannot be combined with search; search returns the top matches only")
+    if sort not in RECIPE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(RECIPE_SORTS)}")
+    if order not in ('asc', 'desc'):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    if search and sort != 'name':
+        raise HTTPException(status_code=400, detail="sort cannot be combined with search; search results are ordered by relevance")
+    conditions = []
+    params = []
+    if recipe_type:
+        conditions.append("recipe_type = %s")
+        params.append(recipe_type)
+    required_tags = parse_tags(','.join(value for value in (extra_categories, tags_all) if value))
+    if required_tags:
+        conditions.append("tags @> %s::text[]")
+        params.append(required_tags)
+    any_tags = parse_tags(tags_any or '')
+    if any_tags:
+        conditions.append("tags && %s::text[]")
+        params.append(any_tags)
+    ranges = {
+        'calories': (min_calories, max_calories),
+        'fat': (min_fat, max_fat),
+        'carbs': (min_carbs, max_carbs),
+        'protein': (min_protein, max_protein)
+    }
+    for column in NUTRITION_COLUMNS:
+        low, high = ranges[column]
+        if low is not None:
+            conditions.append(f"{column} >= %s")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"{column} <= %s")
+            params.append(high)
+    sort_key, sort_condition = RECIPE_SORTS[sort]
+    if sort_condition:
+        conditions.append(sort_condition)
+    direction = "DESC" if order == 'desc' else ""
+    if cursor:
+        # Cursors carry the sort and order they were issued for, so their key values fit the sort column
+        key_kind = str if sort == 'name' else Decimal
+        cursor_sort, cursor_order, *after = decode_cursor(cursor, [str, str, key_kind, int])
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise HTTPException(status_code=400, detail="cursor was issued for a different sort or order")
+        conditions.append(f"({sort_key}, recipe_id) {'<' if direction else '>'} (%s, %s)")
+        params.extend(after)
+    order_by = f"sort_key {direction}, recipe_id {direction}"
+    order_params = []
+    if search:
+        condition, condition_params, order_by, order_params = search_clauses(search)
+        conditions.append(condition)
+        params.extend(condition_params)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    with pooled_connection() as conn:
+        db_cursor = conn.cursor()
+        # The trailing sort key column is only used for the cursor; RECIPE_SHAPE's dicts leave it out
+        db_cursor.execute(f"""
+            SELECT {RECIPE_SHAPE.sql}, {sort_key} AS sort_key
+            FROM recipes {where}
+            ORDER BY {order_by}
+            LIMIT %s
+        """, (*params, *order_params, size if search else size + 1))
+        rows = db_cursor.fetchall()
+        if not search:
+            rows = paginate(rows, size, response, lambda row: [sort, order, row[-1], row[0]])
+        db_cursor.close()
+    return rows_response(RECIPE_SHAPE, rows, response)
+
+@app.get("/recipes/{recipe_id}", response_model=Recipe)
+def get_recipe(recipe_id: int):
+    """Get a specific recipe"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
+                   recipe_url, ingredients, instructions, directions, calories, 
+                   fat, carbs, protein, extra_categories 
+            FROM recipes WHERE recipe_id = %s
+        """, (recipe_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    if row:
+        return Recipe(
+            recipe_id=row[0],
+            recipe_name=row[1],
+            recipe_type=row[2],
+            recipe_source=row[3],
+            source_user_id=row[4],
+            recipe_url=row[5],
+            ingredients=row[6],
+            instructions=row[7],
+            directions=row[8],
+            calories=row[9],
+            fat=float(row[10]) if row[10] is not None else None,
+            carbs=float(row[11]) if row[11] is not None else None,
+            protein=float(row[12]) if row[12] is not None else None,
+            extra_categories=row[13]
+        )
+    return {"error": "Recipe not found"}
+
+@app.post("/recipes", response_model=Recipe)
+def create_recipe(recipe: Recipe):
+    """Create a new recipe in the database"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO recipes (recipe_name, recipe_type, recipe_source, source_user_id, 
+                                   recipe_url, ingredients, instructions, directions, 
+                                   calories, fat, carbs, protein, extra_categories) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
+                RETURNING recipe_id, recipe_name, recipe_type, recipe_source, source_user_id, 
+                         recipe_url, ingredients, instructions, directions, calories, 
+                         fat, carbs, protein, extra_categories
+            """, (
+                recipe.recipe_name, recipe.recipe_type, recipe.recipe_source, recipe.source_user_id,
+                recipe.recipe_url, recipe.ingredients, recipe.instructions, recipe.directions,
+                recipe.calories, recipe.fat, recipe.carbs, recipe.protein, recipe.extra_categories
+            ))
+            row = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+        return Recipe(
+            recipe_id=row[0],
+            recipe_name=row[1],
+            recipe_type=row[2],
+            recipe_source=row[3],
+            source_user_id=row[4],
+            recipe_url=row[5],
+            ingredients=row[6],
+            instructions=row[7],
+            directions=row[8],
+            calories=row[9],
+            fat=float(row[10]) if row[10] is not None else None,
+            carbs=float(row[11]) if row[11] is not None else None,
+            protein=float(row[12]) if row[12] is not None else None,
+            extra_categories=row[13]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Most recipes one recommendation call may return
+RECOMMENDATION_MAX_LIMIT = int(os.getenv('RECOMMENDATION_MAX_LIMIT', '100'))
+
+@app.get("/users/{user_id}/recommended-recipes")
+def get_recommended_recipes(user_id: int, limit: int = 10):
+    """
+    Recipes that best fit one meal of the user's calorie and protein targets (from their weight goal,
+    latest weight and recent activity), favouring ones like the recipes they generated themselves.
+    """
+    targets = nutrition_targets(user_id)
+    if targets is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    ranked = recommend(recipe_matrix.snapshot(), targets, user_id, max(1, min(limit, RECOMMENDATION_MAX_LIMIT)))
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {RECIPE_SHAPE.sql} FROM recipes WHERE recipe_id = ANY(%s)",
+                       ([recipe_id for recipe_id, _ in ranked],))
+        recipes = {row[0]: RECIPE_SHAPE.to_dict(row) for row in cursor.fetchall()}
+        cursor.close()
+    return {
+        "user_id": user_id,
+        "targets": targets,
+        "recipes": [dict(recipes[recipe_id], score=score) for recipe_id, score in ranked if recipe_id in recipes]
+    }
+
+@app.get("/users/{user_id}/meal-plan")
+def get_meal_plan(user_id: int, days: int = 1):
+    """
+    Plan up to MEAL_PLAN_MAX_DAYS days of three meals each that land near the user's daily calorie
+    target with at least their protein target, without repeating a recipe.
+    """
+    if days < 1 or days > MEAL_PLAN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MEAL_PLAN_MAX_DAYS}")
+    targets = nutrition_targets(user_id)
+    if targets is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    plan = plan_meals(recipe_matrix.snapshot(), targets, days)
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {RECIPE_SHAPE.sql} FROM recipes WHERE recipe_id = ANY(%s)",
+                       ([recipe_id for day in plan for recipe_id in day["recipe_ids"]],))
+        recipes = {row[0]: RECIPE_SHAPE.to_dict(row) for row in cursor.fetchall()}
+        cursor.close()
+    for day in plan:
+        day["recipes"] = [recipes[recipe_id] for recipe_id in day.pop("recipe_ids") if recipe_id in recipes]
+    return {"user_id": user_id, "targets": targets, "days": plan}
+
+def user_exists(user_id: int) -> bool:
+    """Check whether a user with the given id exists"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    return row is not None
+
+@app.post("/generate-recipe")
+async def generate_recipe(request: RecipeGenerationRequest):
+    """Generate a recipe using GPT based on user directions and save it to the database"""
+    try:
+        # Validate that the user exists
+        if not await run_in_threadpool(user_exists, request.user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        # Generate and save the recipe (the LLM call is async and does not block other requests)
+        result = await generate_and_save_recipe(
+            user_directions=request.user_directions,
+            user_id=request.user_id,
+            model=request.model
+        )
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": result["message"],
+                "recipe": result["recipe"],
+                "cached": result["cached"]
+            }
+        else:
+            raise HTTPException(status_code=500, detail=result["error"])
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Recipe generation failed: {str(e)}")
+
+@app.post("/generate-recipe/stream")
+async def generate_recipe_stream(request: RecipeGenerationRequest):
+    """Generate a recipe and stream GPT tokens as Server-Sent Events, ending with the saved recipe"""
+    if not await run_in_threadpool(user_exists, request.user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    async def event_stream():
+        async for event, data in stream_and_save_recipe(request.user_directions, request.user_id, request.model):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate-recipe/batch")
+async def generate_recipe_batch(request: BatchRecipeGenerationRequest):
+    """Generate recipes for many direction strings concurrently and save them with one INSERT, reporting per-item results"""
+    max_batch_size = int(os.getenv('RECIPE_BATCH_MAX_SIZE', '50'))
+    if not request.directions:
+        raise HTTPException(status_code=400, detail="directions must not be empty")
+    if len(request.directions) > max_batch_size:
+        raise HTTPException(status_code=400, detail=f"At most {max_batch_size} directions per batch")
+    if not await run_in_threadpool(user_exists, request.user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    try:
+        return await generate_and_save_recipes(request.directions, request.user_id, request.model)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch recipe generation failed: {str(e)}")
+
+@app.post("/recipe-jobs", status_code=202)
+async def submit_recipe_job(request: RecipeGenerationRequest):
+    """Queue a recipe generation and return a job id immediately; poll GET /recipe-jobs/{job_id} for the result"""
+    if not await run_in_threadpool(user_exists, request.user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        job = recipe_job_queue.submit(request.user_id, request.user_directions, request.model)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue recipe generation: {str(e)}")
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/recipe-jobs/{job.job_id}"
+    }
+
+@app.get("/recipe-jobs/metrics")
+async def recipe_job_metrics():
+    """Get recipe job queue depth, throughput and latency metrics"""
+    return recipe_job_queue.metrics()
+
+@app.get("/recipe-jobs/{job_id}")
+async def get_recipe_job(job_id: str, wait: float = 0):
+    """Get a recipe job's status; pass wait (seconds, max 30) to long-poll until it finishes"""
+    job = recipe_job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await recipe_job_queue.wait(job, min(max(wait, 0), 30))
+    return job.to_dict()
+
+@app.get("/weight-cache/stats")
+async def weight_cache_stats():
+    """Get per-user weight timeline cache statistics"""
+    return weight_cache.stats()
+
+@app.get("/recipe-matrix/stats")
+def recipe_matrix_stats():
+    """Get the size of the in-memory recipe matrix used for recommendations"""
+    data = recipe_matrix.snapshot()
+    return {"recipes": len(data.recipe_ids), "tags": len(data.tag_index), "max_recipe_id": data.max_recipe_id,
+            "bytes": data.macros.nbytes + data.features.nbytes}
+
+@app.get("/recipe-cache/stats")
+async def recipe_cache_stats():
+    """Get generated-recipe cache statistics (hits, misses, entries, coalesced generations)"""
+    stats = await get_recipe_cache().stats()
+    stats["single_flight"] = generation_flights.stats()
+    return stats
+
+@app.delete("/recipe-cache")
+async def clear_recipe_cache():
+    """Remove every cached generated recipe"""
+    await get_recipe_cache().clear()
+    return {"success": True, "message": "Recipe cache cleared"}
+
+# Simple Strava integration endpoint (placeholder)
+@app.get("/strava/connect")
+async def connect_strava():
+    """Placeholder for Strava connection"""
+    return {
+        "message": "Strava integration coming soon!",
+        "client_id": os.getenv("STRAVA_CLIENT_ID", "not configured")
+    }
+
+def load_sample_file(name: str, label: str, count_key: str) -> dict:
+    """Bulk load one sample CSV in its own transaction and build the endpoint response"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            stats = load_sample_data(cursor, name)
+            conn.commit()
+            cursor.close()
+        
+        return {
+            "success": True,
+            "message": f"Successfully loaded {stats['rows_loaded']} {label}",
+            count_key: stats["rows_loaded"],
+            "elapsed_seconds": stats["elapsed_seconds"],
+            "rows_per_second": stats["rows_per_second"],
+            "note": "This is sample/demo data for testing purposes"
+        }
+        
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="CSV file not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
+
+@app.post("/load-activity-data")
+def load_activity_data():
+    """Load sample activity data from CSV file into the database. This endpoint loads sample/demo fitness activity data for testing and development purposes."""
+    return load_sample_file("activities", "sample activities", "activities_loaded")
+
+@app.post("/load-user-data")
+def load_user_data():
+    """Load sample user data from CSV file into the database, skipping emails that already exist. This endpoint loads sample/demo user data for testing and development purposes."""
+    return load_sample_file("users", "sample users", "users_loaded")
+
+@app.post("/load-biometric-data")
+def load_biometric_data():
+    """Load sample biometric data from CSV file into the database. This endpoint loads sample/demo health metrics data for testing and development purposes."""
+    try:
+        return load_sample_file("biometrics", "sample biometric entries", "biometrics_loaded")
+    finally:
+        weight_cache.clear()
+
+@app.post("/load-test-data")
+def load_test_data():
+    """Load all sample data from CSV files into the database (users, activities, biometrics, exercise definitions, recipes). This endpoint loads sample/demo data for testing and development purposes."""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+        
+            results = {
+                "users_loaded": 0,
+                "activities_loaded": 0,
+                "biometrics_loaded": 0,
+                "exercise_definitions_loaded": 0,
+                "recipes_loaded": 0,
+                "rows_per_second": {},
+                "errors": []
+            }
+        
+            # Load users first (since activities and biometrics reference user_id).
+            # Each file is loaded under its own savepoint so one failure does not discard the others.
+            for name, csv_name in [
+                ("users", "userData.csv"),
+                ("activities", "activityData.csv"),
+                ("biometrics", "biometricData.csv"),
+                ("exercise_definitions", "exerciseDefinitions.csv"),
+                ("recipes", "recipeData.csv")
+            ]:
+                cursor.execute("SAVEPOINT load_file")
+                try:
+                    stats = load_sample_data(cursor, name)
+                    cursor.execute("RELEASE SAVEPOINT load_file")
+                    results[f"{name}_loaded"] = stats["rows_loaded"]
+                    results["rows_per_second"][name] = stats["rows_per_second"]
+                except FileNotFoundError:
+                    cursor.execute("ROLLBACK TO SAVEPOINT load_file")
+                    results["errors"].append(f"{csv_name} not found")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT load_file")
+                    results["errors"].append(f"Error loading {name.replace('_', ' ')}: {str(e)}")
+        
+            conn.commit()
+            cursor.close()
+        met_cache.invalidate()
+        weight_cache.clear()
+        
+        # Determine success status
+        total_loaded = results["users_loaded"] + results["activities_loaded"] + results["biometrics_loaded"] + results["exercise_definitions_loaded"] + results["recipes_loaded"]
+        success = len(results["errors"]) == 0
+        
+        return {
+            "success": success,
+            "message": f"Loaded {total_loaded} total sample records",
+            "details": results,
+            "note": "This is sample/demo data for testing purposes"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
+
+@app.post("/load-exercise-definitions")
+def load_exercise_definitions():
+    """Load exercise definitions from CSV file into the database. This endpoint loads exercise types and their MET values for calorie calculations."""
+    try:
+        response = load_sample_file("exercise_definitions", "exercise definitions", "definitions_loaded")
+    finally:
+        met_cache.invalidate()
+    response["note"] = "Exercise definitions loaded for calorie calculations"
+    return response
+
+@app.post("/load-recipe-data")
+def load_recipe_data():
+    """Load sample recipe data from CSV file into the database. This endpoint loads sample/demo recipe data for testing and development purposes."""
+    return load_sample_file("recipes", "sample recipes", "recipes_loaded")
+
+def activity_import_values(record: dict, user_id: int) -> tuple:
+    """Validate one uploaded activity row against the Activity model"""
+    if record.get('user_id') and int(record['user_id']) != user_id:
+        raise ValueError(f"Row belongs to user {record['user_id']}, not {user_id}")
+    if not record.get('activity_date'):
+        raise ValueError("activity_date is required")
+    activity = Activity(**{**record, "user_id": user_id, "activity_date": parse_date(record['activity_date'])})
+    return activity_values(activity, activity.calories_burned, units.time_seconds(activity.time, activity.time_units))
+
+def insert_imported_activities(rows: List[tuple]) -> int:
+    """Insert one chunk of uploaded activities"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO activities (
+                user_id, activity_type, distance, distance_units, time, time_units,
+                speed, speed_units, calories_burned, activity_date, time_seconds, distance_meters
+            ) VALUES %s
+        """, rows, page_size=len(rows))
+        conn.commit()
+        cursor.close()
+    return len(rows)
+
+def biometric_import_values(record: dict, user_id: int) -> tuple:
+    """Validate one uploaded biometrics row against the Biometrics model"""
+    if record.get('user_id') and int(record['user_id']) != user_id:
+        raise ValueError(f"Row belongs to user {record['user_id']}, not {user_id}")
+    if not record.get('date'):
+        raise ValueError("date is required")
+    return biometric_values(Biometrics(**{**record, "user_id": user_id, "date": parse_date(record['date'])}))
+
+def insert_imported_biometrics(rows: List[tuple]) -> int:
+    """Upsert one chunk of uploaded biometrics (a day already on record is replaced)"""
+    rows = dedupe_biometric_values(rows)
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, BIOMETRIC_INSERT_SQL, rows, page_size=len(rows))
+        conn.commit()
+        cursor.close()
+    for user_id in {row[0] for row in rows}:
+        weight_cache.invalidate(user_id)
+    return len(rows)
+
+async def run_csv_import(request: Request, kind: str, user_id: int, import_id: Optional[str], to_values, insert_rows) -> dict:
+    """Shared driver for the streaming CSV import endpoints"""
+    if not await run_in_threadpool(user_exists, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        content_length = request.headers.get('Content-Length')
+        progress = start_import(kind, import_id, int(content_length) if content_length else None)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    try:
+        return await import_csv_upload(request, progress, lambda record: to_values(record, user_id), insert_rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Import failed after {progress['rows_inserted']} rows: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed after {progress['rows_inserted']} rows: {str(e)}")
+
+@app.post("/import/activities")
+async def import_activities(request: Request, user_id: int, import_id: Optional[str] = None):
+    """Import a user's activity history from a multipart CSV upload (field 'file'), parsed and inserted in chunks as it streams in"""
+    return await run_csv_import(request, "activities", user_id, import_id, activity_import_values, insert_imported_activities)
+
+@app.post("/import/biometrics")
+async def import_biometrics(request: Request, user_id: int, import_id: Optional[str] = None):
+    """Import a user's biometric history from a multipart CSV upload (field 'file'), parsed and inserted in chunks as it streams in"""
+    return await run_csv_import(request, "biometrics", user_id, import_id, biometric_import_values, insert_imported_biometrics)
+
+@app.get("/imports/{import_id}")
+async def get_import_progress(import_id: str):
+    """Get the progress of a running or recently finished CSV import"""
+    progress = imports.get(import_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return progress
+
+if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080) 
\ No newline at end of file
@@ -0,0 +1,160 @@
+import os
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from recommendations import RecipeData, CALORIES, FAT, CARBS, PROTEIN, MEALS_PER_DAY
+
+# Load environment variables
+load_dotenv()
+
+# Most days one plan may cover
+MEAL_PLAN_MAX_DAYS = int(os.getenv('MEAL_PLAN_MAX_DAYS', '7'))
+
+# Recipes kept after pruning: half closest to the per-meal calorie target, half with the most
+# protein per calorie. Every day is solved exactly over this pool (see best_day).
+MEAL_PLAN_CANDIDATES = int(os.getenv('MEAL_PLAN_CANDIDATES', '300'))
+
+# Recipes outside this range of the per-meal calorie target are never considered
+MIN_MEAL_FRACTION = 0.25
+MAX_MEAL_FRACTION = 2.0
+
+# Objective: relative calorie miss plus this weight times the relative protein shortfall
+PROTEIN_SHORTFALL_WEIGHT = 1.0
+# A day meets its targets within this calorie miss and protein shortfall (fractions of the target)
+CALORIE_TOLERANCE = 0.1
+PROTEIN_TOLERANCE = 0.1
+
+# Third-meal candidates tried per pair for the first bound, around the calorie remainder in the
+# calorie-sorted pool, and pairs scored per exhaustive pass
+THIRD_MEAL_OFFSETS = np.arange(-2, 3)
+PAIR_CHUNK = 4096
+
+def smallest(values: np.ndarray, count: int) -> np.ndarray:
+    """Positions of the count smallest values, in no particular order"""
+    if len(values) <= count:
+        return np.arange(len(values))
+    return np.argpartition(values, count - 1)[:count]
+
+def candidate_pool(data: RecipeData, targets: Dict) -> np.ndarray:
+    """
+    Rows of data worth planning with. Recipes without calories or protein, or far from a meal's
+    calories, are dropped, as are repeats with identical nutrition (interchangeable for the solver,
+    and they would defeat variety across days); the rest are pruned to MEAL_PLAN_CANDIDATES.
+    """
+    calories = data.macros[:, CALORIES]
+    protein = data.macros[:, PROTEIN]
+    meal_calories = targets["meal_calories"]
+    with np.errstate(invalid='ignore'):
+        usable = ((calories >= MIN_MEAL_FRACTION * meal_calories) & (calories <= MAX_MEAL_FRACTION * meal_calories)
+                  & (calories > 0) & ~np.isnan(protein))
+    rows = np.flatnonzero(usable)
+
+    # Shortlist twice the quota by each measure, so dropping repeats still leaves a full pool
+    half = MEAL_PLAN_CANDIDATES // 2
+    miss = np.abs(calories[rows] - meal_calories)
+    density = protein[rows] / calories[rows]
+    shortlist = np.union1d(rows[smallest(miss, 2 * half)], rows[smallest(-density, 2 * half)])
+    _, first = np.unique(data.macros[shortlist], axis=0, return_index=True)
+    shortlist = shortlist[np.sort(first)]
+
+    closest = shortlist[np.argsort(np.abs(calories[shortlist] - meal_calories), kind='stable')[:half]]
+    densest = shortlist[np.argsort(-(protein[shortlist] / calories[shortlist]), kind='stable')[:half]]
+    return np.union1d(closest, densest)
+
+def day_objective(total_calories: np.ndarray, total_protein: np.ndarray, daily_calories: float,
+                  daily_protein: float) -> np.ndarray:
+    """Relative calorie miss plus the weighted relative protein shortfall of each day's totals"""
+    return (np.abs(total_calories - daily_calories) / daily_calories
+            + PROTEIN_SHORTFALL_WEIGHT * np.maximum(daily_protein - total_protein, 0) / daily_protein)
+
+def best_day(calories: np.ndarray, protein: np.ndarray, daily_calories: float,
+             daily_protein: float) -> Optional[np.ndarray]:
+    """
+    Positions of the MEALS_PER_DAY (three) recipes with the lowest day objective, or None with
+    fewer than three. The answer is exact over the pool.
+
+    The best triple among each pair's nearest-calorie thirds gives a first bound. A triple's objective
+    is at least its calorie miss plus the protein shortfall the pair would have even with the most
+    protein any recipe has, so for each pair only the thirds within bound minus that shortfall of the
+    remaining calories can do better. Those are scored exhaustively, PAIR_CHUNK pairs at a time,
+    tightening the bound as better days are found.
+    """
+    count = len(calories)
+    if count < MEALS_PER_DAY:
+        return None
+    order = np.argsort(calories, kind='stable')
+    sorted_calories = calories[order]
+    sorted_protein = protein[order]
+
+    # Triples are (first, second, third) in calorie order with first < second < third, so each is tried once
+    first, second = np.triu_indices(count, k=1)
+    pair_calories = sorted_calories[first] + sorted_calories[second]
+    pair_protein = sorted_protein[first] + sorted_protein[second]
+    remainder = daily_calories - pair_calories
+
+    nearest = np.searchsorted(sorted_calories, remainder)
+    third = nearest[:, None] + THIRD_MEAL_OFFSETS[None, :]
+    valid = (third > second[:, None]) & (third < count)
+    third = np.clip(third, 0, count - 1)
+    objective = day_objective(pair_calories[:, None] + sorted_calories[third],
+                              pair_protein[:, None] + sorted_protein[third], daily_calories, daily_protein)
+    objective[~valid] = np.inf
+    best = int(np.argmin(objective))
+    bound = objective.flat[best]
+    best_triple = (first[best // objective.shape[1]], second[best // objective.shape[1]], third.flat[best])
+
+    shortfall_floor = (PROTEIN_SHORTFALL_WEIGHT
+                       * np.maximum(daily_protein - pair_protein - sorted_protein.max(), 0) / daily_protein)
+    for start in range(0, len(first), PAIR_CHUNK):
+        chunk = slice(start, start + PAIR_CHUNK)
+        slack = (bound - shortfall_floor[chunk]) * daily_calories
+        low = np.searchsorted(sorted_calories, remainder[chunk] - slack, side='left')
+        high = np.searchsorted(sorted_calories, remainder[chunk] + slack, side='right')
+        low = np.maximum(low, second[chunk] + 1)
+        lengths = np.where(slack >= 0, np.maximum(high - low, 0), 0)
+        total = int(lengths.sum())
+        if not total:
+            continue
+        # Expand to one entry per (pair, third) candidate
+        pairs = np.repeat(np.arange(start, start + len(lengths)), lengths)
+        thirds = np.repeat(low - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        objective = day_objective(pair_calories[pairs] + sorted_calories[thirds],
+                                  pair_protein[pairs] + sorted_protein[thirds], daily_calories, daily_protein)
+        candidate = int(np.argmin(objective))
+        if objective[candidate] < bound:
+            bound = objective[candidate]
+            best_triple = (first[pairs[candidate]], second[pairs[candidate]], thirds[candidate])
+
+    if not np.isfinite(bound):
+        return None
+    return order[list(best_triple)]
+
+def plan_meals(data: RecipeData, targets: Dict, days: int) -> List[Dict]:
+    """
+    A day-by-day plan of three recipes each, as close as possible to the daily calorie target with
+    at least the daily protein target. Recipes are not repeated within a plan; days stop early if
+    the pool runs out.
+    """
+    pool = candidate_pool(data, targets)
+    daily_calories = targets["daily_calories"]
+    daily_protein = targets["daily_protein"]
+    plan = []
+    for day in range(1, days + 1):
+        chosen = best_day(data.macros[pool, CALORIES], data.macros[pool, PROTEIN], daily_calories, daily_protein)
+        if chosen is None:
+            break
+        rows = pool[chosen]
+        pool = np.delete(pool, chosen)
+        totals = np.nansum(data.macros[rows], axis=0)
+        calorie_miss = abs(totals[CALORIES] - daily_calories) / daily_calories
+        protein_shortfall = max(daily_protein - totals[PROTEIN], 0) / daily_protein
+        plan.append({
+            "day": day,
+            "recipe_ids": [int(recipe_id) for recipe_id in data.recipe_ids[rows]],
+            "calories": int(round(totals[CALORIES])),
+            "fat": round(float(totals[FAT]), 1),
+            "carbs": round(float(totals[CARBS]), 1),
+            "protein": round(float(totals[PROTEIN]), 1),
+            "meets_targets": bool(calorie_miss <= CALORIE_TOLERANCE and protein_shortfall <= PROTEIN_TOLERANCE)
+        })
+    return plan
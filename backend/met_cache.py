@@ -0,0 +1,72 @@
+import os
+import time
+import threading
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from db_connection import pooled_connection
+
+# Load environment variables
+load_dotenv()
+
+# MET used when neither the activity type nor 'Miscellaneous' is defined
+DEFAULT_MET_VALUE = 2.0
+
+class MetCache:
+    """
+    Process-wide copy of the exercise_definitions MET table, keyed by lower-cased name.
+    The table is small and rarely written, so it is loaded whole on first use and reloaded
+    after invalidate() (called by every endpoint that writes it) or once ttl seconds pass,
+    which also picks up changes made by other processes.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, float]] = None
+        self._miscellaneous: Optional[float] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        """Drop the cached table; the next lookup reloads it"""
+        with self._lock:
+            self._values = None
+            self._generation += 1
+
+    def get_met_value(self, activity_type: str) -> float:
+        """MET for an activity type (case-insensitive), else 'Miscellaneous', else DEFAULT_MET_VALUE"""
+        values, miscellaneous = self._table()
+        met_value = values.get(activity_type.lower())
+        if met_value is not None:
+            return met_value
+        return miscellaneous if miscellaneous is not None else DEFAULT_MET_VALUE
+
+    def _table(self):
+        with self._lock:
+            if self._values is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._values, self._miscellaneous
+            generation = self._generation
+
+        # Query outside the lock; a concurrent first lookup at worst loads the table twice
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT exercise_name, avg_met_value FROM exercise_definitions ORDER BY exercise_id")
+            rows = cursor.fetchall()
+            cursor.close()
+        values = {}
+        miscellaneous = None
+        for name, met_value in rows:
+            values.setdefault(name.lower(), float(met_value))
+            if miscellaneous is None and name == 'Miscellaneous':
+                miscellaneous = float(met_value)
+
+        with self._lock:
+            # A write that invalidated the cache while we were loading wins; don't store stale data
+            if generation == self._generation:
+                self._values = values
+                self._miscellaneous = miscellaneous
+                self._loaded_at = time.monotonic()
+        return values, miscellaneous
+
+# Shared by every request handler in the process
+met_cache = MetCache(ttl=float(os.getenv('MET_CACHE_TTL', '300')))
@@ -0,0 +1,384 @@
+import json
+from typing import Dict, List
+from db_connection import pooled_connection
+from weight_cache import WEIGHT_TIMELINE_SQL, WEIGHT_AS_OF_SQL, BATCH_WEIGHT_SQL
+
+# Arbitrary key for the advisory lock that serializes migration runs across workers
+MIGRATION_LOCK_ID = 4815162342
+
+# Ordered schema migrations. Never edit or reorder an applied migration; append a new one.
+MIGRATIONS = [
+    {
+        "version": 1,
+        "name": "create base tables",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                email VARCHAR(255) UNIQUE NOT NULL,
+                weight_goal VARCHAR(20),
+                password VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS activities (
+                activity_id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                activity_date DATE NOT NULL,
+                activity_type VARCHAR(100) NOT NULL,
+                distance DECIMAL(10,2),
+                distance_units VARCHAR(20),
+                time DECIMAL(10,3),
+                time_units VARCHAR(20),
+                speed DECIMAL(10,2),
+                speed_units VARCHAR(20),
+                calories_burned INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS biometrics (
+                biometric_id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                date DATE NOT NULL,
+                weight DECIMAL(5,2),
+                weight_units VARCHAR(10),
+                avg_hr INTEGER,
+                high_hr INTEGER,
+                low_hr INTEGER,
+                notes TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS exercise_definitions (
+                exercise_id SERIAL PRIMARY KEY,
+                exercise_name VARCHAR(100) NOT NULL,
+                avg_met_value DECIMAL(4,2) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS recipes (
+                recipe_id SERIAL PRIMARY KEY,
+                recipe_name VARCHAR(255) NOT NULL,
+                recipe_type VARCHAR(50),
+                recipe_source VARCHAR(100),
+                source_user_id INTEGER,
+                recipe_url TEXT,
+                ingredients TEXT,
+                instructions TEXT,
+                directions TEXT,
+                calories INTEGER,
+                fat DECIMAL(5,2),
+                carbs DECIMAL(5,2),
+                protein DECIMAL(5,2),
+                extra_categories VARCHAR(255),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        ]
+    },
+    {
+        "version": 2,
+        "name": "index hot lookup paths",
+        "statements": [
+            # /activities?user_id=... ORDER BY activity_date DESC
+            "CREATE INDEX IF NOT EXISTS idx_activities_user_date ON activities (user_id, activity_date DESC)",
+            # weight lookups: WHERE user_id = ... [AND date <= ...] ORDER BY date DESC LIMIT 1
+            "CREATE INDEX IF NOT EXISTS idx_biometrics_user_date ON biometrics (user_id, date DESC)",
+            # MET lookups: WHERE LOWER(exercise_name) = LOWER(...)
+            "CREATE INDEX IF NOT EXISTS idx_exercise_definitions_lower_name ON exercise_definitions (LOWER(exercise_name))"
+        ]
+    },
+    {
+        "version": 3,
+        "name": "index keyset pagination",
+        "statements": [
+            # Keyset pages: (sort column, primary key) < / > (cursor) ORDER BY sort column, primary key.
+            # The user-scoped indexes replace the version 2 ones, which they cover.
+            "CREATE INDEX IF NOT EXISTS idx_activities_user_date_id ON activities (user_id, activity_date DESC, activity_id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_activities_date_id ON activities (activity_date DESC, activity_id DESC)",
+            "DROP INDEX IF EXISTS idx_activities_user_date",
+            "CREATE INDEX IF NOT EXISTS idx_biometrics_user_date_id ON biometrics (user_id, date DESC, biometric_id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_biometrics_date_id ON biometrics (date DESC, biometric_id DESC)",
+            "DROP INDEX IF EXISTS idx_biometrics_user_date",
+            "CREATE INDEX IF NOT EXISTS idx_recipes_name_id ON recipes (recipe_name, recipe_id)",
+            "CREATE INDEX IF NOT EXISTS idx_recipes_type_name_id ON recipes (recipe_type, recipe_name, recipe_id)"
+        ]
+    },
+    {
+        "version": 4,
+        "name": "one biometrics entry per user per day",
+        "statements": [
+            # Keep the most recently inserted row of each (user_id, date) group
+            """
+            DELETE FROM biometrics AS older
+            USING biometrics AS newer
+            WHERE older.user_id = newer.user_id
+              AND older.date = newer.date
+              AND older.biometric_id < newer.biometric_id
+            """,
+            "ALTER TABLE biometrics ADD CONSTRAINT biometrics_user_date_key UNIQUE (user_id, date)"
+        ]
+    },
+    {
+        "version": 5,
+        "name": "canonical unit columns",
+        "statements": [
+            # Nullable with no default, so adding them does not rewrite the tables;
+            # existing rows are filled by the batched backfill in units.py (POST /backfill/canonical-units)
+            "ALTER TABLE activities ADD COLUMN IF NOT EXISTS time_seconds DOUBLE PRECISION",
+            "ALTER TABLE activities ADD COLUMN IF NOT EXISTS distance_meters DOUBLE PRECISION",
+            "ALTER TABLE biometrics ADD COLUMN IF NOT EXISTS weight_kg DOUBLE PRECISION"
+        ]
+    },
+    {
+        "version": 6,
+        "name": "recipe search",
+        "statements": [
+            # Weighted full-text document: name first, then tags, then ingredients
+            """
+            ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', COALESCE(recipe_name, '')), 'A') ||
+                setweight(to_tsvector('english', COALESCE(extra_categories, '')), 'B') ||
+                setweight(to_tsvector('english', COALESCE(ingredients, '')), 'C')
+            ) STORED
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_recipes_search_vector ON recipes USING GIN (search_vector)",
+            # Fuzzy name matching needs pg_trgm (a contrib extension); search falls back to full text without it
+            """
+            DO $$
+            BEGIN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'pg_trgm is not available: %', SQLERRM;
+            END
+            $$
+            """,
+            """
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                    CREATE INDEX IF NOT EXISTS idx_recipes_name_trgm ON recipes USING GIN (recipe_name gin_trgm_ops);
+                END IF;
+            END
+            $$
+            """
+        ]
+    },
+    {
+        "version": 7,
+        "name": "recipe tags",
+        "statements": [
+            # extra_categories split on commas, trimmed and lower-cased; generated, so existing rows are
+            # backfilled by the ALTER and every write path keeps it in sync
+            """
+            ALTER TABLE recipes ADD COLUMN IF NOT EXISTS tags TEXT[] GENERATED ALWAYS AS (
+                array_remove(regexp_split_to_array(lower(btrim(extra_categories)), '[[:space:]]*,[[:space:]]*'), '')
+            ) STORED
+            """,
+            # /recipes?tags_any=... (&&) and ?tags_all=... / ?extra_categories=... (@>)
+            "CREATE INDEX IF NOT EXISTS idx_recipes_tags ON recipes USING GIN (tags)"
+        ]
+    },
+    {
+        "version": 8,
+        "name": "index recipe nutrition sorts",
+        "statements": [
+            # /recipes?sort=...: keyset pages over (sort expression, recipe_id), either direction.
+            # Range filters on the sort column use the same index; the partial ratio index matches
+            # the condition RECIPE_SORTS adds for that sort.
+            "CREATE INDEX IF NOT EXISTS idx_recipes_calories_id ON recipes (calories, recipe_id)",
+            "CREATE INDEX IF NOT EXISTS idx_recipes_protein_id ON recipes (protein, recipe_id)",
+            """
+            CREATE INDEX IF NOT EXISTS idx_recipes_protein_per_calorie_id
+            ON recipes ((protein::float8 / NULLIF(calories, 0)), recipe_id)
+            WHERE calories > 0 AND protein IS NOT NULL
+            """,
+            # recipe_type plus a calorie range or calorie sort
+            "CREATE INDEX IF NOT EXISTS idx_recipes_type_calories_id ON recipes (recipe_type, calories, recipe_id)"
+        ]
+    },
+    {
+        "version": 9,
+        "name": "drop unused MET name index",
+        "statements": [
+            # MET values come from met_cache's load of the whole (small) table; no query filters on the name
+            "DROP INDEX IF EXISTS idx_exercise_definitions_lower_name"
+        ]
+    }
+]
+
+# Hot queries and the index each is expected to use (or a set of indexes when more than one can
+# serve it and the planner picks by cost), checked with EXPLAIN by check_index_usage()
+INDEX_CHECKS = [
+    {
+        "name": "activities by user",
+        "sql": "SELECT activity_id FROM activities WHERE user_id = %s ORDER BY activity_date DESC, activity_id DESC LIMIT 201",
+        "params": (1,),
+        "index": "idx_activities_user_date_id"
+    },
+    {
+        "name": "activities page after cursor",
+        "sql": ("SELECT activity_id FROM activities WHERE (activity_date, activity_id) < (%s, %s) "
+                "ORDER BY activity_date DESC, activity_id DESC LIMIT 201"),
+        "params": ("2025-01-01", 1000),
+        "index": "idx_activities_date_id"
+    },
+    {
+        "name": "biometrics by user page after cursor",
+        "sql": ("SELECT biometric_id FROM biometrics WHERE user_id = %s AND (date, biometric_id) < (%s, %s) "
+                "ORDER BY date DESC, biometric_id DESC LIMIT 201"),
+        "params": (1, "2025-01-01", 1000),
+        "index": "idx_biometrics_user_date_id"
+    },
+    {
+        "name": "recipes by type page after cursor",
+        "sql": ("SELECT recipe_id FROM recipes WHERE recipe_type = %s AND (recipe_name, recipe_id) > (%s, %s) "
+                "ORDER BY recipe_name, recipe_id LIMIT 201"),
+        "params": ("Dinner", "M", 0),
+        "index": "idx_recipes_type_name_id"
+    },
+    {
+        "name": "weight timeline",
+        "sql": WEIGHT_TIMELINE_SQL,
+        "params": (1,),
+        "index": {"biometrics_user_date_key", "idx_biometrics_user_date_id"}
+    },
+    {
+        "name": "weight as of date",
+        "sql": WEIGHT_AS_OF_SQL,
+        "params": (1, "2025-01-01"),
+        "index": {"biometrics_user_date_key", "idx_biometrics_user_date_id"}
+    },
+    {
+        "name": "batch weights as of dates",
+        "sql": BATCH_WEIGHT_SQL,
+        "params": ([1, 2], ["2025-01-01", "2025-02-01"]),
+        "index": {"biometrics_user_date_key", "idx_biometrics_user_date_id"}
+    },
+    {
+        "name": "recipe full-text search",
+        "sql": "SELECT recipe_id FROM recipes WHERE search_vector @@ websearch_to_tsquery('english', %s)",
+        "params": ("chicken",),
+        "index": "idx_recipes_search_vector"
+    },
+    {
+        "name": "recipes by tag",
+        "sql": "SELECT recipe_id FROM recipes WHERE tags @> %s::text[]",
+        "params": (["breakfast"],),
+        "index": "idx_recipes_tags"
+    },
+    {
+        "name": "recipes by calorie range",
+        "sql": "SELECT recipe_id FROM recipes WHERE calories BETWEEN %s AND %s ORDER BY calories, recipe_id LIMIT 201",
+        "params": (400, 500),
+        "index": "idx_recipes_calories_id"
+    },
+    {
+        "name": "recipes by protein per calorie",
+        "sql": ("SELECT recipe_id FROM recipes WHERE calories > 0 AND protein IS NOT NULL "
+                "ORDER BY protein::float8 / NULLIF(calories, 0) DESC, recipe_id DESC LIMIT 201"),
+        "params": (),
+        "index": "idx_recipes_protein_per_calorie_id"
+    }
+]
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def run_migrations() -> List[Dict]:
+    """
+    Apply every pending migration in version order, each in its own transaction.
+    An advisory lock makes concurrent runs (e.g. several workers starting) wait for each other.
+    Returns the migrations applied by this run.
+    """
+    applied = []
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        ensure_migrations_table(cursor)
+        conn.commit()
+
+        for migration in MIGRATIONS:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (migration["version"],))
+            if cursor.fetchone():
+                conn.commit()
+                continue
+            for statement in migration["statements"]:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration["version"], migration["name"])
+            )
+            conn.commit()
+            applied.append({"version": migration["version"], "name": migration["name"]})
+        cursor.close()
+    return applied
+
+def get_migration_status() -> Dict:
+    """List applied and pending migrations"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        ensure_migrations_table(cursor)
+        cursor.execute("SELECT version, name, applied_at FROM schema_migrations ORDER BY version")
+        rows = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+    applied_versions = {row[0] for row in rows}
+    return {
+        "current_version": max(applied_versions) if applied_versions else 0,
+        "latest_version": MIGRATIONS[-1]["version"],
+        "applied": [{"version": row[0], "name": row[1], "applied_at": str(row[2])} for row in rows],
+        "pending": [{"version": m["version"], "name": m["name"]} for m in MIGRATIONS
+                    if m["version"] not in applied_versions]
+    }
+
+def plan_index_names(plan: Dict) -> List[str]:
+    """Collect every index referenced anywhere in an EXPLAIN (FORMAT JSON) plan tree"""
+    names = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(plan_index_names(child))
+    return names
+
+def check_index_usage() -> List[Dict]:
+    """
+    EXPLAIN each INDEX_CHECKS query and report whether the planner picks the expected index.
+    Sequential scans are disabled for the check so the answer does not depend on table size:
+    it verifies the index can serve the query, which is what a seq scan on a large table would miss.
+    """
+    results = []
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        for check in INDEX_CHECKS:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + check["sql"], check["params"])
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = plan_index_names(plan[0]["Plan"])
+            expected = {check["index"]} if isinstance(check["index"], str) else check["index"]
+            results.append({
+                "name": check["name"],
+                "expected_indexes": sorted(expected),
+                "indexes_used": used,
+                "ok": bool(expected & set(used))
+            })
+        conn.rollback()
+        cursor.close()
+    return results
+
+if __name__ == "__main__":
+    for migration in run_migrations():
+        print(f"Applied migration {migration['version']}: {migration['name']}")
+    for check in check_index_usage():
+        print(f"{'OK ' if check['ok'] else 'MISSING'} {check['name']}: {check['indexes_used']}")
@@ -0,0 +1,72 @@
+import os
+import json
+import base64
+import datetime
+from decimal import Decimal
+from typing import List, Optional, Sequence
+from fastapi import HTTPException, Response
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Page size used when the client does not pass `limit`, and the most it may ask for
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '200'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def page_size(limit: Optional[int]) -> int:
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def cursor_value(value, kind: type):
+    """
+    One decoded cursor value as kind: int, str, datetime.date (an ISO date string) or Decimal
+    (any number, or a numeric string as encode_cursor writes DECIMAL columns); raises ValueError otherwise
+    """
+    if kind is datetime.date and isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    if kind is Decimal and isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        number = Decimal(value) if isinstance(value, str) else value
+        # Within float's exponent range, which Postgres can always compare with a number column
+        if Decimal(number).is_finite() and abs(Decimal(number).adjusted()) <= 308:
+            return number
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind is str and isinstance(value, str) and '\x00' not in value:  # Postgres text cannot hold NUL
+        return value
+    raise ValueError(f"cursor value {value!r} is not a {kind.__name__}")
+
+def decode_cursor(cursor: str, kinds: Sequence[type]) -> List:
+    """
+    Decode a cursor produced by encode_cursor into one value per entry of kinds (see cursor_value).
+    Raises HTTP 400 if it is malformed or a value has the wrong type, so a tampered cursor never
+    reaches the database.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError("wrong number of cursor values")
+        return [cursor_value(value, kind) for value, kind in zip(values, kinds)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(rows: list, limit: int, response: Response, sort_key) -> list:
+    """
+    Trim a result fetched with LIMIT limit + 1 to one page.
+    When there is a further page, its cursor (built from sort_key(last_row)) is set on the response.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_key(rows[-1]))
+    return rows
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+def normalize_directions(user_directions: str) -> str:
+    """
+    Normalize user directions so near-identical prompts share a cache entry.
+    Case, punctuation and repeated whitespace are ignored:
+    "High-protein  vegan dinner!" -> "high protein vegan dinner"
+    """
+    text = unicodedata.normalize('NFKC', user_directions or '').lower()
+    text = re.sub(r'[^\w]+', ' ', text)
+    return ' '.join(text.split())
+
+def make_cache_key(user_directions: str, model: str) -> str:
+    """Build the cache key for a (directions, model) pair"""
+    normalized = f"{model}\n{normalize_directions(user_directions)}"
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+class InMemoryCacheBackend:
+    """
+    Process-local cache with per-entry TTL and least-recently-used eviction.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Dict, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+class RedisCacheBackend:
+    """
+    Cache shared by every worker and instance, stored in Redis.
+    TTL is enforced with SETEX; LRU eviction is left to Redis (maxmemory-policy allkeys-lru).
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "recipe-cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise Exception("RECIPE_CACHE_URL is set but the 'redis' package is not installed")
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        raw = await self._redis.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Dict, ttl: float):
+        await self._redis.setex(self.prefix + key, max(int(ttl), 1), json.dumps(value))
+
+    async def clear(self):
+        keys = [key async for key in self._redis.scan_iter(match=self.prefix + '*')]
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def size(self) -> int:
+        return len([key async for key in self._redis.scan_iter(match=self.prefix + '*')])
+
+class RecipeCache:
+    """
+    Cache of parsed GPT recipes keyed on normalized directions + model.
+    Backend failures are counted and treated as misses so the cache can never break generation.
+    """
+
+    def __init__(self, backend, ttl: float = 86400, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, user_directions: str, model: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        try:
+            value = await self.backend.get(make_cache_key(user_directions, model))
+        except Exception:
+            self.errors += 1
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, user_directions: str, model: str, recipe_data: Dict):
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(make_cache_key(user_directions, model), recipe_data, self.ttl)
+        except Exception:
+            self.errors += 1
+
+    async def clear(self):
+        await self.backend.clear()
+
+    async def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        try:
+            entries = await self.backend.size()
+        except Exception:
+            entries = None
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": getattr(self.backend, 'evictions', None)
+        }
+
+_recipe_cache = None
+
+def get_recipe_cache() -> RecipeCache:
+    """
+    Get the process-wide recipe cache, creating it on first use.
+    Uses Redis when RECIPE_CACHE_URL is set, otherwise an in-process LRU
+    sized by RECIPE_CACHE_MAX_ENTRIES. Entries live for RECIPE_CACHE_TTL seconds.
+    """
+    global _recipe_cache
+    if _recipe_cache is None:
+        url = os.getenv('RECIPE_CACHE_URL')
+        if url:
+            backend = RedisCacheBackend(url)
+        else:
+            backend = InMemoryCacheBackend(max_entries=int(os.getenv('RECIPE_CACHE_MAX_ENTRIES', '1024')))
+        _recipe_cache = RecipeCache(
+            backend,
+            ttl=float(os.getenv('RECIPE_CACHE_TTL', '86400')),
+            enabled=os.getenv('RECIPE_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+        )
+    return _recipe_cache
@@ -1,224 +1,496 @@
-import os
-import json
-from openai import OpenAI
-from typing import Dict, Optional, List
-from dotenv import load_dotenv
-from db_connection import get_db_connection
-
-# Load environment variables
-load_dotenv()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def chat_with_gpt(messages: List[Dict], model: str = "gpt-3.5-turbo") -> str:
-    """
-    Send messages to GPT and return the response.
-    """
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        raise Exception(f"GPT API call failed: {str(e)}")
-
-def generate_recipe_with_gpt(user_directions: str, model: str = "gpt-3.5-turbo") -> Dict:
-    """
-    Prompts ChatGPT to generate a recipe in JSON format given user directions.
-    The response will contain:
-        - recipe_name
-        - recipe_type (Omnivore, Vegan, Keto, Paleo, or Vegetarian)
-        - ingredients (bulleted list)
-        - instructions (numbered list)
-        - calories per serving
-        - fats per serving
-        - carbs per serving
-        - extra_categories (any other useful tags)
-    """
-    system_prompt = (
-        "You are a helpful assistant that generates recipes in JSON format. "
-        "Given user directions, output a recipe as a JSON object with the following fields: "
-        "recipe_name, recipe_type (Omnivore, Vegan, Keto, Paleo, or Vegetarian), "
-        "ingredients (as a bulleted list), instructions (as a numbered list), "
-        "calories (per serving), fat (per serving in grams without including units), carbs (per serving in grams without including units), protein (per serving in grams without including units), "
-        "and extra_categories (any other useful tags). "
-        "Respond ONLY with the JSON object."
-        "If you cannot generate a recipe, return an empty JSON object."
-    )
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_directions}
-    ]
-    
-    response = chat_with_gpt(messages, model=model)
-    
-    # Try to parse the response as JSON
-    try:
-        # Clean the response in case there's extra text
-        response = response.strip()
-        if response.startswith('```json'):
-            response = response[7:]
-        if response.endswith('```'):
-            response = response[:-3]
-        response = response.strip()
-        
-        recipe_data = json.loads(response)
-        return recipe_data
-    except json.JSONDecodeError as e:
-        raise Exception(f"Failed to parse GPT response as JSON: {str(e)}")
-
-def parse_numeric_value(value) -> float:
-    """
-    Parse numeric values that might contain units (e.g., "10g", "250 calories")
-    Returns just the numeric part as a float.
-    """
-    if value is None:
-        return 0.0
-    
-    # Convert to string if not already
-    value_str = str(value).strip()
-    
-    if not value_str:
-        return 0.0
-    
-    # Remove common units and extra text
-    import re
-    # Extract just the numeric part (including decimals)
-    numeric_match = re.search(r'(\d+\.?\d*)', value_str)
-    
-    if numeric_match:
-        return float(numeric_match.group(1))
-    else:
-        return 0.0
-
-def clean_json_formatting(value, use_newlines=True) -> str:
-    """
-    Clean JSON-style formatting from strings.
-    Removes surrounding braces and quotes, converts to clean format.
-    
-    Args:
-        value: The value to clean
-        use_newlines: If True, join with newlines; if False, join with commas
-    """
-    if not value:
-        return ""
-    
-    value_str = str(value).strip()
-    
-    # Remove surrounding braces if present
-    if value_str.startswith('{') and value_str.endswith('}'):
-        value_str = value_str[1:-1].strip()
-    
-    # Remove quotes around individual items and clean up
-    import re
-    # Split by comma and clean each item
-    items = [item.strip().strip('"\'') for item in value_str.split(',')]
-    
-    # Filter out empty items
-    items = [item for item in items if item]
-    
-    if not items:
-        return ""
-    
-    # Join with newlines for ingredients/instructions, commas for categories
-    separator = '\n' if use_newlines else ', '
-    return separator.join(items)
-
-def save_recipe_to_database(recipe_data: Dict, user_id: int) -> Dict:
-    """
-    Save the generated recipe to the database.
-    Returns the saved recipe with its ID.
-    """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Extract data from recipe_data, with fallbacks for missing fields
-        recipe_name = recipe_data.get('recipe_name', 'Generated Recipe')
-        recipe_type = recipe_data.get('recipe_type', 'Omnivore')
-        
-        # Clean JSON formatting from text fields
-        ingredients = clean_json_formatting(recipe_data.get('ingredients', ''), use_newlines=True)
-        instructions = clean_json_formatting(recipe_data.get('instructions', ''), use_newlines=True)
-        extra_categories = clean_json_formatting(recipe_data.get('extra_categories', ''), use_newlines=False)
-        
-        # Parse nutritional values to remove units and convert to numbers
-        calories = int(parse_numeric_value(recipe_data.get('calories', 0)))
-        fat = parse_numeric_value(recipe_data.get('fat', 0.0))
-        carbs = parse_numeric_value(recipe_data.get('carbs', 0.0))
-        protein = parse_numeric_value(recipe_data.get('protein', 0.0))
-        
-        # Insert the recipe (let database auto-generate recipe_id)
-        cursor.execute("""
-            INSERT INTO recipes (
-                recipe_name, recipe_type, recipe_source, source_user_id,
-                recipe_url, ingredients, instructions, directions, calories,
-                fat, carbs, protein, extra_categories
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING recipe_id, recipe_name, recipe_type, recipe_source, source_user_id,
-                     recipe_url, ingredients, instructions, directions, calories,
-                     fat, carbs, protein, extra_categories
-        """, (
-            recipe_name, recipe_type, 'GPT Generated', user_id,
-            None, ingredients, instructions, None, calories,
-            fat, carbs, protein, extra_categories
-        ))
-        
-        row = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        # Return the saved recipe
-        return {
-            "recipe_id": row[0],
-            "recipe_name": row[1],
-            "recipe_type": row[2],
-            "recipe_source": row[3],
-            "source_user_id": row[4],
-            "recipe_url": row[5],
-            "ingredients": row[6],
-            "instructions": row[7],
-            "directions": row[8],
-            "calories": row[9],
-            "fat": float(row[10]) if row[10] is not None else None,
-            "carbs": float(row[11]) if row[11] is not None else None,
-            "protein": float(row[12]) if row[12] is not None else None,
-            "extra_categories": row[13]
-        }
-        
-    except Exception as e:
-        raise Exception(f"Failed to save recipe to database: {str(e)}")
-
-def generate_and_save_recipe(user_directions: str, user_id: int, model: str = "gpt-3.5-turbo") -> Dict:
-    """
-    Complete workflow: generate recipe with GPT and save to database.
-    If any step fails, no data is saved and an error is returned.
-    """
-    try:
-        # Step 1: Generate recipe with GPT
-        recipe_data = generate_recipe_with_gpt(user_directions, model)
-        
-        # Step 2: Validate that we got a proper recipe
-        if not recipe_data or not recipe_data.get('recipe_name'):
-            raise Exception("GPT failed to generate a valid recipe")
-        
-        # Step 3: Save to database
-        saved_recipe = save_recipe_to_database(recipe_data, user_id)
-        
-        return {
-            "success": True,
-            "message": "Recipe generated and saved successfully",
-            "recipe": saved_recipe
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "recipe": None
-        } 
\ No newline at end of file
+import os
+import json
+import asyncio
+import random
+import openai
+from openai import AsyncOpenAI
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from psycopg2.extras import execute_values
+from db_connection import pooled_connection
+from recipe_cache import get_recipe_cache, make_cache_key
+from single_flight import SingleFlight
+
+# Load environment variables
+load_dotenv()
+
+# LLM call limits: in-flight calls per process, per-attempt timeout (seconds),
+# retries on transient failures and the base delay for exponential backoff
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_RETRY_BACKOFF = float(os.getenv("OPENAI_RETRY_BACKOFF", "0.5"))
+
+# Generations run concurrently per batch request
+RECIPE_BATCH_CONCURRENCY = int(os.getenv("RECIPE_BATCH_CONCURRENCY", "4"))
+
+# Errors worth retrying; anything else (bad request, auth) fails immediately
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+_client = None
+_llm_semaphore = None
+
+# Identical generations that are in flight at the same time share one LLM call
+generation_flights = SingleFlight()
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Get the shared async OpenAI client, creating it on first use.
+    OPENAI_BASE_URL can point it at any OpenAI-compatible server (e.g. a local stub).
+    """
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=0  # retries are handled by chat_with_gpt so they respect the semaphore
+        )
+    return _client
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding in-flight LLM calls.
+    Created lazily so it binds to the running event loop.
+    """
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given retry attempt (0-based)"""
+    return OPENAI_RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+
+async def chat_with_gpt(messages: List[Dict], model: str = "gpt-3.5-turbo", timeout: Optional[float] = None) -> str:
+    """
+    Send messages to GPT and return the response.
+    Waits for a free slot on the LLM semaphore, applies a per-attempt timeout
+    and retries transient failures with exponential backoff.
+    """
+    timeout = OPENAI_TIMEOUT if timeout is None else timeout
+    attempt = 0
+    while True:
+        try:
+            async with get_llm_semaphore():
+                response = await asyncio.wait_for(
+                    get_openai_client().chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=1000,
+                        temperature=0.7,
+                        timeout=timeout
+                    ),
+                    timeout=timeout
+                )
+            return response.choices[0].message.content.strip()
+        except RETRYABLE_ERRORS as e:
+            if attempt >= OPENAI_MAX_RETRIES:
+                raise Exception(f"GPT API call failed after {attempt + 1} attempts: {str(e) or type(e).__name__}")
+            # Back off outside the semaphore so waiting retries do not hold a slot
+            await asyncio.sleep(retry_delay(attempt))
+            attempt += 1
+        except Exception as e:
+            raise Exception(f"GPT API call failed: {str(e)}")
+
+async def stream_chat_with_gpt(messages: List[Dict], model: str = "gpt-3.5-turbo",
+                              timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Stream a GPT completion, yielding content deltas as they arrive.
+    Holds an LLM semaphore slot for the whole stream. Transient failures are
+    retried like chat_with_gpt, but only until the first token has been sent.
+    """
+    timeout = OPENAI_TIMEOUT if timeout is None else timeout
+    attempt = 0
+    while True:
+        started = False
+        try:
+            async with get_llm_semaphore():
+                stream = await asyncio.wait_for(
+                    get_openai_client().chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=1000,
+                        temperature=0.7,
+                        stream=True,
+                        timeout=timeout
+                    ),
+                    timeout=timeout
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        started = True
+                        yield delta
+            return
+        except RETRYABLE_ERRORS as e:
+            if started or attempt >= OPENAI_MAX_RETRIES:
+                raise Exception(f"GPT API stream failed after {attempt + 1} attempts: {str(e) or type(e).__name__}")
+            await asyncio.sleep(retry_delay(attempt))
+            attempt += 1
+        except Exception as e:
+            raise Exception(f"GPT API stream failed: {str(e)}")
+
+def parse_recipe_response(response: str) -> Dict:
+    """
+    Parse a GPT recipe response as JSON, stripping markdown code fences if present.
+    """
+    try:
+        # Clean the response in case there's extra text
+        response = response.strip()
+        if response.startswith('```json'):
+            response = response[7:]
+        if response.endswith('```'):
+            response = response[:-3]
+        response = response.strip()
+        
+        recipe_data = json.loads(response)
+        return recipe_data
+    except json.JSONDecodeError as e:
+        raise Exception(f"Failed to parse GPT response as JSON: {str(e)}")
+
+def build_recipe_messages(user_directions: str) -> List[Dict]:
+    """
+    Build the chat messages asking GPT for a recipe in JSON format.
+    The response will contain:
+        - recipe_name
+        - recipe_type (Omnivore, Vegan, Keto, Paleo, or Vegetarian)
+        - ingredients (bulleted list)
+        - instructions (numbered list)
+        - calories per serving
+        - fats per serving
+        - carbs per serving
+        - extra_categories (any other useful tags)
+    """
+    system_prompt = (
+        "You are a helpful assistant that generates recipes in JSON format. "
+        "Given user directions, output a recipe as a JSON object with the following fields: "
+        "recipe_name, recipe_type (Omnivore, Vegan, Keto, Paleo, or Vegetarian), "
+        "ingredients (as a bulleted list), instructions (as a numbered list), "
+        "calories (per serving), fat (per serving in grams without including units), carbs (per serving in grams without including units), protein (per serving in grams without including units), "
+        "and extra_categories (any other useful tags). "
+        "Respond ONLY with the JSON object."
+        "If you cannot generate a recipe, return an empty JSON object."
+    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_directions}
+    ]
+
+async def generate_recipe_with_gpt(user_directions: str, model: str = "gpt-3.5-turbo") -> Dict:
+    """
+    Prompts ChatGPT to generate a recipe in JSON format given user directions.
+    """
+    messages = build_recipe_messages(user_directions)
+    
+    response = await chat_with_gpt(messages, model=model)
+    
+    # Try to parse the response as JSON
+    return parse_recipe_response(response)
+
+def parse_numeric_value(value) -> float:
+    """
+    Parse numeric values that might contain units (e.g., "10g", "250 calories")
+    Returns just the numeric part as a float.
+    """
+    if value is None:
+        return 0.0
+    
+    # Convert to string if not already
+    value_str = str(value).strip()
+    
+    if not value_str:
+        return 0.0
+    
+    # Remove common units and extra text
+    import re
+    # Extract just the numeric part (including decimals)
+    numeric_match = re.search(r'(\d+\.?\d*)', value_str)
+    
+    if numeric_match:
+        return float(numeric_match.group(1))
+    else:
+        return 0.0
+
+def clean_json_formatting(value, use_newlines=True) -> str:
+    """
+    Clean JSON-style formatting from strings.
+    Removes surrounding braces and quotes, converts to clean format.
+    
+    Args:
+        value: The value to clean
+        use_newlines: If True, join with newlines; if False, join with commas
+    """
+    if not value:
+        return ""
+    
+    value_str = str(value).strip()
+    
+    # Remove surrounding braces if present
+    if value_str.startswith('{') and value_str.endswith('}'):
+        value_str = value_str[1:-1].strip()
+    
+    # Remove quotes around individual items and clean up
+    import re
+    # Split by comma and clean each item
+    items = [item.strip().strip('"\'') for item in value_str.split(',')]
+    
+    # Filter out empty items
+    items = [item for item in items if item]
+    
+    if not items:
+        return ""
+    
+    # Join with newlines for ingredients/instructions, commas for categories
+    separator = '\n' if use_newlines else ', '
+    return separator.join(items)
+
+def build_recipe_values(recipe_data: Dict, user_id: int) -> tuple:
+    """
+    Turn parsed GPT recipe data into the column values for a recipes INSERT.
+    """
+    # Extract data from recipe_data, with fallbacks for missing fields
+    recipe_name = recipe_data.get('recipe_name', 'Generated Recipe')
+    recipe_type = recipe_data.get('recipe_type', 'Omnivore')
+    
+    # Clean JSON formatting from text fields
+    ingredients = clean_json_formatting(recipe_data.get('ingredients', ''), use_newlines=True)
+    instructions = clean_json_formatting(recipe_data.get('instructions', ''), use_newlines=True)
+    extra_categories = clean_json_formatting(recipe_data.get('extra_categories', ''), use_newlines=False)
+    
+    # Parse nutritional values to remove units and convert to numbers
+    calories = int(parse_numeric_value(recipe_data.get('calories', 0)))
+    fat = parse_numeric_value(recipe_data.get('fat', 0.0))
+    carbs = parse_numeric_value(recipe_data.get('carbs', 0.0))
+    protein = parse_numeric_value(recipe_data.get('protein', 0.0))
+    
+    return (
+        recipe_name, recipe_type, 'GPT Generated', user_id,
+        None, ingredients, instructions, None, calories,
+        fat, carbs, protein, extra_categories
+    )
+
+def recipe_row_to_dict(row) -> Dict:
+    """
+    Convert a recipes row (in RECIPE_RETURNING column order) to a response dict.
+    """
+    return {
+        "recipe_id": row[0],
+        "recipe_name": row[1],
+        "recipe_type": row[2],
+        "recipe_source": row[3],
+        "source_user_id": row[4],
+        "recipe_url": row[5],
+        "ingredients": row[6],
+        "instructions": row[7],
+        "directions": row[8],
+        "calories": row[9],
+        "fat": float(row[10]) if row[10] is not None else None,
+        "carbs": float(row[11]) if row[11] is not None else None,
+        "protein": float(row[12]) if row[12] is not None else None,
+        "extra_categories": row[13]
+    }
+
+RECIPE_INSERT_COLUMNS = """
+    recipe_name, recipe_type, recipe_source, source_user_id,
+    recipe_url, ingredients, instructions, directions, calories,
+    fat, carbs, protein, extra_categories
+"""
+
+RECIPE_RETURNING = """
+    recipe_id, recipe_name, recipe_type, recipe_source, source_user_id,
+    recipe_url, ingredients, instructions, directions, calories,
+    fat, carbs, protein, extra_categories
+"""
+
+def save_recipe_to_database(recipe_data: Dict, user_id: int) -> Dict:
+    """
+    Save the generated recipe to the database.
+    Returns the saved recipe with its ID.
+    """
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Insert the recipe (let database auto-generate recipe_id)
+            cursor.execute(
+                f"INSERT INTO recipes ({RECIPE_INSERT_COLUMNS}) "
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                f"RETURNING {RECIPE_RETURNING}",
+                build_recipe_values(recipe_data, user_id)
+            )
+            
+            row = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+        
+        # Return the saved recipe
+        return recipe_row_to_dict(row)
+        
+    except Exception as e:
+        raise Exception(f"Failed to save recipe to database: {str(e)}")
+
+def save_recipes_to_database(recipes: List[Dict], user_id: int) -> List[Dict]:
+    """
+    Save several generated recipes with one multi-row INSERT.
+    Returns the saved recipes in the same order as the input.
+    """
+    if not recipes:
+        return []
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            rows = execute_values(
+                cursor,
+                f"INSERT INTO recipes ({RECIPE_INSERT_COLUMNS}) VALUES %s RETURNING {RECIPE_RETURNING}",
+                [build_recipe_values(recipe_data, user_id) for recipe_data in recipes],
+                page_size=len(recipes),
+                fetch=True
+            )
+            conn.commit()
+            cursor.close()
+        
+        return [recipe_row_to_dict(row) for row in rows]
+        
+    except Exception as e:
+        raise Exception(f"Failed to save recipes to database: {str(e)}")
+
+async def generate_and_cache_recipe(user_directions: str, model: str = "gpt-3.5-turbo") -> Dict:
+    """
+    Generate a recipe with GPT, validate it and store it in the recipe cache.
+    """
+    recipe_data = await generate_recipe_with_gpt(user_directions, model)
+    
+    # Validate that we got a proper recipe
+    if not recipe_data or not recipe_data.get('recipe_name'):
+        raise Exception("GPT failed to generate a valid recipe")
+    
+    await get_recipe_cache().set(user_directions, model, recipe_data)
+    return recipe_data
+
+async def get_or_generate_recipe(user_directions: str, model: str = "gpt-3.5-turbo") -> Tuple[Dict, bool]:
+    """
+    Return a parsed recipe for the directions, serving it from the recipe cache when possible.
+    Concurrent misses for the same directions are coalesced into a single GPT call.
+    Returns (recipe_data, cached) where cached is True if this call did not run its own completion.
+    """
+    recipe_data = await get_recipe_cache().get(user_directions, model)
+    if recipe_data is not None:
+        return recipe_data, True
+    
+    return await generation_flights.do(
+        make_cache_key(user_directions, model),
+        lambda: generate_and_cache_recipe(user_directions, model)
+    )
+
+async def generate_and_save_recipe(user_directions: str, user_id: int, model: str = "gpt-3.5-turbo") -> Dict:
+    """
+    Complete workflow: generate recipe with GPT (or reuse a cached one) and save to database.
+    Every call saves its own row for the user, even on a cache hit.
+    If any step fails, no data is saved and an error is returned.
+    """
+    try:
+        # Step 1: Generate (or look up) and validate the recipe
+        recipe_data, cached = await get_or_generate_recipe(user_directions, model)
+        
+        # Step 2: Save to database (blocking, so run it off the event loop)
+        saved_recipe = await run_in_threadpool(save_recipe_to_database, recipe_data, user_id)
+        
+        return {
+            "success": True,
+            "message": "Recipe generated and saved successfully",
+            "recipe": saved_recipe,
+            "cached": cached
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "recipe": None
+        }
+
+async def generate_and_save_recipes(directions_list: List[str], user_id: int, model: str = "gpt-3.5-turbo",
+                                    concurrency: int = None) -> Dict:
+    """
+    Batch workflow: generate a recipe for each direction string concurrently (at most
+    `concurrency` at a time, on top of the global LLM limit), then save every
+    successful recipe with a single multi-row INSERT.
+    Returns per-item results in input order.
+    """
+    concurrency = concurrency or RECIPE_BATCH_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def generate_one(user_directions: str):
+        async with semaphore:
+            return await get_or_generate_recipe(user_directions, model)
+    
+    outcomes = await asyncio.gather(
+        *(generate_one(user_directions) for user_directions in directions_list),
+        return_exceptions=True
+    )
+    
+    results = []
+    to_save = []
+    for index, (user_directions, outcome) in enumerate(zip(directions_list, outcomes)):
+        result = {"index": index, "user_directions": user_directions}
+        if isinstance(outcome, Exception):
+            result.update({"success": False, "error": str(outcome), "recipe": None})
+        else:
+            recipe_data, cached = outcome
+            result.update({"success": True, "cached": cached})
+            to_save.append((result, recipe_data))
+        results.append(result)
+    
+    try:
+        saved = await run_in_threadpool(save_recipes_to_database, [recipe_data for _, recipe_data in to_save], user_id)
+        for (result, _), saved_recipe in zip(to_save, saved):
+            result["recipe"] = saved_recipe
+    except Exception as e:
+        for result, _ in to_save:
+            result.update({"success": False, "error": str(e), "recipe": None})
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "success": succeeded == len(results),
+        "message": f"Generated and saved {succeeded} of {len(results)} recipes",
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+async def stream_and_save_recipe(user_directions: str, user_id: int,
+                                 model: str = "gpt-3.5-turbo") -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Streaming workflow: forward GPT tokens as they arrive, then parse, cache and save the recipe.
+    Yields (event, data) pairs: ("token", {"text": ...}) while generating, then
+    ("recipe", {"recipe": ..., "cached": ...}) once saved, or ("error", {"error": ...}).
+    A cached recipe is saved and returned without streaming any tokens.
+    """
+    try:
+        recipe_data = await get_recipe_cache().get(user_directions, model)
+        cached = recipe_data is not None
+        
+        if not cached:
+            chunks = []
+            async for text in stream_chat_with_gpt(build_recipe_messages(user_directions), model=model):
+                chunks.append(text)
+                yield "token", {"text": text}
+            
+            recipe_data = parse_recipe_response(''.join(chunks))
+            if not recipe_data or not recipe_data.get('recipe_name'):
+                raise Exception("GPT failed to generate a valid recipe")
+            await get_recipe_cache().set(user_directions, model, recipe_data)
+        
+        saved_recipe = await run_in_threadpool(save_recipe_to_database, recipe_data, user_id)
+        yield "recipe", {"recipe": saved_recipe, "cached": cached}
+        
+    except Exception as e:
+        yield "error", {"error": str(e)}
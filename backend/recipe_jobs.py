@@ -0,0 +1,176 @@
+import os
+import time
+import uuid
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from recipe_generation import generate_and_save_recipe
+
+# Load environment variables
+load_dotenv()
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class RecipeJob:
+    """A queued recipe generation and its outcome"""
+
+    def __init__(self, user_id: int, user_directions: str, model: str):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.user_directions = user_directions
+        self.model = model
+        self.status = "queued"
+        self.result = None
+        self.cached = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "user_id": self.user_id,
+            "model": self.model,
+            "recipe": self.result,
+            "cached": self.cached,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class RecipeJobQueue:
+    """
+    In-process queue of recipe generations served by a fixed number of worker tasks.
+    Finished jobs are kept for job_ttl seconds so clients can collect the result.
+    """
+
+    def __init__(self, worker_count: int = 4, max_queue_size: int = 100, job_ttl: float = 3600,
+                 latency_window: int = 500):
+        self.worker_count = worker_count
+        self.max_queue_size = max_queue_size
+        self.job_ttl = job_ttl
+        self._jobs: Dict[str, RecipeJob] = {}
+        self._queue = None
+        self._workers = []
+        self._running = 0
+        self._counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0}
+        self._queue_waits = deque(maxlen=latency_window)
+        self._latencies = deque(maxlen=latency_window)
+
+    async def start(self):
+        """Create the queue and spawn the worker tasks (call from the running event loop)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self):
+        """Cancel the worker tasks; queued jobs are abandoned"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, user_id: int, user_directions: str, model: str) -> RecipeJob:
+        """Enqueue a generation and return its job immediately"""
+        if self._queue is None:
+            raise Exception("Recipe job queue is not running")
+        self._prune()
+        job = RecipeJob(user_id, user_directions, model)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            raise QueueFullError(f"Recipe job queue is full ({self.max_queue_size} jobs waiting)")
+        self._jobs[job.job_id] = job
+        self._counters["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[RecipeJob]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: RecipeJob, timeout: float) -> RecipeJob:
+        """Wait up to timeout seconds for the job to finish (long polling)"""
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def metrics(self) -> Dict:
+        def summarize(samples):
+            if not samples:
+                return {"count": 0, "avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+            ordered = sorted(samples)
+            return {
+                "count": len(ordered),
+                "avg_ms": round(1000 * sum(ordered) / len(ordered), 1),
+                "p50_ms": round(1000 * ordered[len(ordered) // 2], 1),
+                "p95_ms": round(1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1),
+                "max_ms": round(1000 * ordered[-1], 1)
+            }
+
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "running": self._running,
+            "tracked_jobs": len(self._jobs),
+            **self._counters,
+            "queue_wait": summarize(self._queue_waits),
+            "job_latency": summarize(self._latencies)
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            self._queue_waits.append(job.started_at - job.created_at)
+            self._running += 1
+            try:
+                result = await generate_and_save_recipe(
+                    user_directions=job.user_directions,
+                    user_id=job.user_id,
+                    model=job.model
+                )
+                if result["success"]:
+                    job.status = "succeeded"
+                    job.result = result["recipe"]
+                    job.cached = result["cached"]
+                    self._counters["succeeded"] += 1
+                else:
+                    job.status = "failed"
+                    job.error = result["error"]
+                    self._counters["failed"] += 1
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self._counters["failed"] += 1
+            finally:
+                self._running -= 1
+                job.finished_at = time.time()
+                self._latencies.append(job.finished_at - job.created_at)
+                job.done.set()
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+# Process-wide job queue; workers are started and stopped with the application
+recipe_job_queue = RecipeJobQueue(
+    worker_count=int(os.getenv('RECIPE_JOB_WORKERS', '4')),
+    max_queue_size=int(os.getenv('RECIPE_JOB_QUEUE_SIZE', '100')),
+    job_ttl=float(os.getenv('RECIPE_JOB_TTL', '3600'))
+)
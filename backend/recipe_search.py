@@ -0,0 +1,69 @@
+import time
+from typing import List, Optional, Tuple
+from db_connection import pooled_connection
+
+# Text search configuration used by the recipes.search_vector column (migration 6)
+SEARCH_CONFIG = 'english'
+
+# Nutrition columns accepted by the /recipes min_<column> / max_<column> range filters
+NUTRITION_COLUMNS = ['calories', 'fat', 'carbs', 'protein']
+
+# Protein grams per calorie; recipes without calories or protein have no ratio
+PROTEIN_PER_CALORIE_SQL = "protein::float8 / NULLIF(calories, 0)"
+
+# /recipes sort options: (sort expression, condition a row needs to have a sort value).
+# Each is backed by a (expression, recipe_id) index from migration 8; rows without a value are
+# left out of nutrition sorts so keyset cursors never have to compare NULLs.
+RECIPE_SORTS = {
+    'name': ("recipe_name", None),
+    'calories': ("calories", "calories IS NOT NULL"),
+    'protein': ("protein", "protein IS NOT NULL"),
+    'protein_per_calorie': (PROTEIN_PER_CALORIE_SQL, "calories > 0 AND protein IS NOT NULL")
+}
+
+# Seconds before a missing pg_trgm is checked for again (migration 6 may install it later)
+TRIGRAM_RECHECK_SECONDS = 60
+
+_trigram_available = False
+_trigram_checked_at: Optional[float] = None
+
+def trigram_available() -> bool:
+    """Whether the pg_trgm extension is installed; once found it is remembered for the process"""
+    global _trigram_available, _trigram_checked_at
+    if _trigram_available:
+        return True
+    if _trigram_checked_at is not None and time.monotonic() - _trigram_checked_at < TRIGRAM_RECHECK_SECONDS:
+        return False
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        _trigram_available = cursor.fetchone() is not None
+        cursor.close()
+    _trigram_checked_at = time.monotonic()
+    return _trigram_available
+
+def reset_trigram_check():
+    """Check for pg_trgm again on the next search (called after migrations run)"""
+    global _trigram_checked_at
+    _trigram_checked_at = None
+
+def search_clauses(search: str) -> Tuple[str, List, str, List]:
+    """
+    WHERE condition and ORDER BY expression (each with its parameters) for a ranked recipe search.
+
+    Recipes match on full text (name, tags and ingredients, stemmed) or, with pg_trgm, on
+    trigram word similarity to the name, which catches typos and partial words. Both sides
+    are served by GIN indexes. Results rank by ts_rank plus name similarity.
+    """
+    tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+    if trigram_available():
+        condition = f"(search_vector @@ {tsquery} OR %s <%% recipe_name)"
+        order = f"ts_rank(search_vector, {tsquery}) + word_similarity(%s, recipe_name) DESC, recipe_id"
+        return condition, [search, search], order, [search, search]
+    condition = f"search_vector @@ {tsquery}"
+    order = f"ts_rank(search_vector, {tsquery}) DESC, recipe_id"
+    return condition, [search], order, [search]
+
+def parse_tags(value: str) -> List[str]:
+    """Comma-separated tag filter to the normalized form stored in recipes.tags (migration 7)"""
+    return [tag.strip().lower() for tag in value.split(',') if tag.strip()]
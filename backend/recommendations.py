@@ -0,0 +1,294 @@
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from db_connection import pooled_connection
+from weight_cache import weight_cache
+from calories import DEFAULT_WEIGHT_KG
+import units
+
+# Load environment variables
+load_dotenv()
+
+# Full reload interval of the recipe matrix (picks up updates and deletes; inserts are picked up
+# on every lookup), and the most distinct tags given a one-hot column (later tags are ignored)
+RECIPE_MATRIX_TTL = float(os.getenv('RECIPE_MATRIX_TTL', '600'))
+RECIPE_MATRIX_MAX_TAGS = int(os.getenv('RECIPE_MATRIX_MAX_TAGS', '64'))
+# Ids below the newest one held that are probed again for late-committing inserts
+RECIPE_MATRIX_ID_OVERLAP = int(os.getenv('RECIPE_MATRIX_ID_OVERLAP', '500'))
+
+# Days of activities averaged into the daily calorie burn
+ACTIVITY_WINDOW_DAYS = int(os.getenv('RECOMMENDATION_ACTIVITY_DAYS', '14'))
+
+# Daily targets: energy before exercise per kg of body weight, scaled per weight goal, and protein per kg
+MEALS_PER_DAY = 3
+MAINTENANCE_KCAL_PER_KG = 30.0
+GOAL_CALORIE_FACTORS = {'lose': 0.8, 'maintain': 1.0, 'gain': 1.15}
+GOAL_PROTEIN_PER_KG = {'lose': 1.6, 'maintain': 1.2, 'gain': 1.8}
+
+# Score weights: calorie fit, protein fit, and similarity to the user's own generated recipes
+CALORIE_WEIGHT = 1.0
+PROTEIN_WEIGHT = 0.5
+SIMILARITY_WEIGHT = 0.75
+# Calorie misses of this fraction of the meal target score exp(-1) of a perfect fit
+CALORIE_TOLERANCE = 0.25
+
+# Columns of RecipeData.macros
+CALORIES, FAT, CARBS, PROTEIN = range(4)
+# Energy per gram of fat, carbs and protein, for the macro share features
+KCAL_PER_GRAM = np.array([9.0, 4.0, 4.0])
+
+RECIPE_MATRIX_SQL = """
+    SELECT recipe_id, source_user_id, calories::float8, fat::float8, carbs::float8, protein::float8, tags
+    FROM recipes
+    WHERE recipe_id > %s AND recipe_id <> ALL(%s::integer[])
+    ORDER BY recipe_id
+"""
+
+def normalize_goal(weight_goal: Optional[str]) -> str:
+    """'lose', 'gain' or 'maintain' (the default) from a users.weight_goal value"""
+    goal = (weight_goal or '').strip().lower()
+    if goal.startswith('lose'):
+        return 'lose'
+    if goal.startswith('gain'):
+        return 'gain'
+    return 'maintain'
+
+class RecipeData:
+    """
+    Recipe nutrition as arrays, one row per recipe.
+    macros holds calories, fat, carbs and protein (NaN when missing); features holds the macro
+    energy shares followed by tag one-hot columns, scaled to unit length for cosine similarity.
+
+    Rows live in buffers with spare capacity. append() writes new recipes past the rows this
+    instance covers and returns a new instance covering them too, so instances already handed
+    to lookups never change. Only the newest instance over a set of buffers may be appended to.
+    """
+
+    def __init__(self, buffers: Dict[str, np.ndarray], count: int, tag_index: Dict[str, int],
+                 max_tags: int, max_recipe_id: int):
+        self._buffers = buffers
+        self.count = count
+        self.tag_index = tag_index
+        self.max_tags = max_tags
+        self.max_recipe_id = max_recipe_id
+
+    @property
+    def recipe_ids(self) -> np.ndarray:
+        return self._buffers["recipe_ids"][:self.count]
+
+    @property
+    def source_user_ids(self) -> np.ndarray:
+        return self._buffers["source_user_ids"][:self.count]
+
+    @property
+    def macros(self) -> np.ndarray:
+        return self._buffers["macros"][:self.count]
+
+    @property
+    def features(self) -> np.ndarray:
+        return self._buffers["features"][:self.count]
+
+    @classmethod
+    def empty(cls, max_tags: int) -> "RecipeData":
+        return cls(cls._allocate(0, max_tags), 0, {}, max_tags, 0)
+
+    @staticmethod
+    def _allocate(capacity: int, max_tags: int) -> Dict[str, np.ndarray]:
+        return {
+            "recipe_ids": np.empty(capacity, np.int64),
+            "source_user_ids": np.empty(capacity, np.int64),
+            "macros": np.empty((capacity, 4)),
+            "features": np.empty((capacity, 3 + max_tags), np.float32)
+        }
+
+    def append(self, rows: Sequence[Tuple]) -> "RecipeData":
+        """
+        A new RecipeData with rows (as selected by RECIPE_MATRIX_SQL) added; recipes already held
+        are skipped. New tags get the next free one-hot column. Buffers grow by at least half when
+        full, so appending a few recipes costs about as much as the recipes themselves.
+        """
+        if rows:
+            held = self.recipe_ids
+            held = set(held[held >= min(row[0] for row in rows)].tolist())
+            rows = [row for row in rows if row[0] not in held]
+        if not rows:
+            return self
+
+        tag_index = self.tag_index
+        count = len(rows)
+        features = np.zeros((count, 3 + self.max_tags), np.float32)
+        macros = np.array([row[2:6] for row in rows], dtype=np.float64)  # None becomes NaN
+        energy = np.nan_to_num(macros[:, FAT:PROTEIN + 1]) * KCAL_PER_GRAM
+        totals = energy.sum(axis=1, keepdims=True)
+        features[:, :3] = np.divide(energy, totals, out=np.zeros_like(energy), where=totals > 0)
+        for position, row in enumerate(rows):
+            for tag in row[6] or ():
+                column = tag_index.get(tag)
+                if column is None and len(tag_index) < self.max_tags:
+                    if tag_index is self.tag_index:
+                        tag_index = dict(tag_index)
+                    column = tag_index[tag] = len(tag_index)
+                if column is not None:
+                    features[position, 3 + column] = 1.0
+        lengths = np.linalg.norm(features, axis=1, keepdims=True)
+        np.divide(features, lengths, out=features, where=lengths > 0)
+
+        buffers = self._buffers
+        end = self.count + count
+        if end > len(buffers["recipe_ids"]):
+            grown = self._allocate(max(end + end // 2, 1024), self.max_tags)
+            for name, buffer in buffers.items():
+                grown[name][:self.count] = buffer[:self.count]
+            buffers = grown
+        buffers["recipe_ids"][self.count:end] = [row[0] for row in rows]
+        buffers["source_user_ids"][self.count:end] = [row[1] if row[1] is not None else -1 for row in rows]
+        buffers["macros"][self.count:end] = macros
+        buffers["features"][self.count:end] = features
+        max_recipe_id = max(self.max_recipe_id, max(row[0] for row in rows))
+        return RecipeData(buffers, end, tag_index, self.max_tags, max_recipe_id)
+
+class RecipeMatrix:
+    """
+    Process-wide RecipeData for the recipes table.
+    Every lookup first fetches recipes it does not hold yet among ids above the newest one held
+    minus id_overlap, which also catches inserts that committed after a higher id was seen (ids
+    are assigned at insert, not at commit); it is an index range probe that returns nothing unless
+    recipes were inserted. The whole table is reloaded after ttl seconds or invalidate(), which
+    picks up updated and deleted recipes. Queries run without the lock; it only guards swapping
+    in new data, so lookups run concurrently.
+    """
+
+    def __init__(self, ttl: float = 600, max_tags: int = 64, id_overlap: int = 500):
+        self.ttl = ttl
+        self.max_tags = max_tags
+        self.id_overlap = id_overlap
+        self._lock = threading.Lock()
+        self._data: Optional[RecipeData] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        """Drop the matrix; the next lookup reloads the table"""
+        with self._lock:
+            self._data = None
+
+    def snapshot(self) -> RecipeData:
+        with self._lock:
+            data = self._data
+            expired = data is None or time.monotonic() - self._loaded_at >= self.ttl
+        if expired:
+            return self._reload()
+
+        floor = max(data.max_recipe_id - self.id_overlap, 0)
+        held = data.recipe_ids
+        rows = self._fetch(floor, held[held > floor].tolist())
+        if not rows:
+            return data
+        with self._lock:
+            # Append to the newest data; a concurrent lookup may have added some of these rows already
+            if self._data is not None:
+                self._data = self._data.append(rows)
+            current = self._data
+        return current if current is not None else self._reload()
+
+    def _reload(self) -> RecipeData:
+        loaded_at = time.monotonic()
+        data = RecipeData.empty(self.max_tags).append(self._fetch(0, []))
+        with self._lock:
+            self._data = data
+            self._loaded_at = loaded_at
+        return data
+
+    def _fetch(self, after_id: int, held_ids: List[int]) -> List[Tuple]:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(RECIPE_MATRIX_SQL, (after_id, held_ids))
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+
+def nutrition_targets(user_id: int) -> Optional[Dict]:
+    """
+    Daily and per-meal calorie and protein targets for a user, or None if the user does not exist.
+    Calories are maintenance for the latest weight scaled by the weight goal, plus the average daily
+    burn over the last ACTIVITY_WINDOW_DAYS of activities; protein is grams per kg for the goal.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT weight_goal FROM users WHERE id = %s", (user_id,))
+        user_row = cursor.fetchone()
+        if user_row is None:
+            cursor.close()
+            return None
+        cursor.execute("""
+            SELECT COALESCE(SUM(calories_burned), 0) FROM activities
+            WHERE user_id = %s AND activity_date > CURRENT_DATE - %s
+        """, (user_id, ACTIVITY_WINDOW_DAYS))
+        burned = float(cursor.fetchone()[0])
+        cursor.close()
+
+    goal = normalize_goal(user_row[0])
+    entry = weight_cache.get(user_id).latest_weight()
+    weight_kg = None
+    if entry is not None:
+        weight_kg = entry[4] if entry[4] is not None else units.weight_kg(entry[1], entry[2])
+    weight_kg = weight_kg or DEFAULT_WEIGHT_KG
+
+    daily_burn = burned / ACTIVITY_WINDOW_DAYS
+    daily_calories = weight_kg * MAINTENANCE_KCAL_PER_KG * GOAL_CALORIE_FACTORS[goal] + daily_burn
+    daily_protein = weight_kg * GOAL_PROTEIN_PER_KG[goal]
+    return {
+        "weight_goal": goal,
+        "weight_kg": round(weight_kg, 2),
+        "daily_activity_calories": round(daily_burn),
+        "daily_calories": round(daily_calories),
+        "daily_protein": round(daily_protein, 1),
+        "meal_calories": round(daily_calories / MEALS_PER_DAY),
+        "meal_protein": round(daily_protein / MEALS_PER_DAY, 1)
+    }
+
+def user_profile(data: RecipeData, user_id: int) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """Unit-length mean feature vector of the user's generated recipes (None without any), and their row mask"""
+    own = data.source_user_ids == user_id
+    if not own.any():
+        return None, own
+    profile = data.features[own].mean(axis=0)
+    length = np.linalg.norm(profile)
+    return (profile / length if length > 0 else None), own
+
+def score_recipes(data: RecipeData, targets: Dict, profile: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Fit of every recipe to one meal of the targets: a Gaussian on the calorie miss, protein up to the
+    meal target, and cosine similarity to profile. Recipes without calories or protein score -inf.
+    """
+    calories = data.macros[:, CALORIES]
+    protein = data.macros[:, PROTEIN]
+    meal_calories = targets["meal_calories"]
+    calorie_fit = np.exp(-np.square((calories - meal_calories) / (CALORIE_TOLERANCE * meal_calories)))
+    protein_fit = np.minimum(protein / targets["meal_protein"], 1.0)
+    scores = CALORIE_WEIGHT * calorie_fit + PROTEIN_WEIGHT * protein_fit
+    if profile is not None:
+        scores += SIMILARITY_WEIGHT * (data.features @ profile)
+    return np.where(np.isnan(scores), -np.inf, scores)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row indexes of the k best finite scores, best first (argpartition, then a sort of just those k)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return candidates[np.isfinite(scores[candidates])]
+
+def recommend(data: RecipeData, targets: Dict, user_id: int, k: int) -> List[Tuple[int, float]]:
+    """(recipe_id, score) of the user's k best recipes, leaving out the ones they generated themselves"""
+    profile, own = user_profile(data, user_id)
+    scores = score_recipes(data, targets, profile)
+    scores[own] = -np.inf
+    rows = top_k(scores, k)
+    return [(int(data.recipe_ids[row]), round(float(scores[row]), 4)) for row in rows]
+
+# Shared by every request handler in the process
+recipe_matrix = RecipeMatrix(ttl=RECIPE_MATRIX_TTL, max_tags=RECIPE_MATRIX_MAX_TAGS, id_overlap=RECIPE_MATRIX_ID_OVERLAP)
@@ -0,0 +1,60 @@
+import json
+import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library encoder
+    orjson = None
+
+def _default(value: Any):
+    """Encode the column types psycopg2 returns that JSON has no native form for"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON bytes with orjson when available, otherwise the json module"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(',', ':')).encode('utf-8')
+
+class FastJSONResponse(Response):
+    """JSON response rendered with dumps(); content is returned as-is, without response_model validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class RowShape:
+    """
+    The SELECT list for a response model and how to turn its rows into dicts.
+
+    Each field is (response key, SQL expression). Numeric columns are cast to float8 in the
+    expression so rows come back as plain Python floats, and DATE columns are left as dates
+    (encoded as YYYY-MM-DD), which makes a row dict just dict(zip(names, row)).
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, str]]):
+        self.names = [name for name, _ in fields]
+        self.sql = ", ".join(expression if expression == name else f"{expression} AS {name}"
+                             for name, expression in fields)
+
+    def to_dict(self, row: Sequence) -> Dict:
+        return dict(zip(self.names, row))
+
+    def to_dicts(self, rows: List[Sequence]) -> List[Dict]:
+        names = self.names
+        return [dict(zip(names, row)) for row in rows]
+
+def rows_response(shape: RowShape, rows: List[Sequence], response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Serialize query rows straight to a JSON array response.
+    Headers already set on the endpoint's injected response (e.g. X-Next-Cursor) are carried over.
+    """
+    headers = {key: value for key, value in response.headers.items() if key != 'content-length'} if response else None
+    return FastJSONResponse(shape.to_dicts(rows), headers=headers)
@@ -0,0 +1,72 @@
+import os
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from dotenv import load_dotenv
+from db_connection import pooled_connection
+from serialization import dumps
+
+# Load environment variables
+load_dotenv()
+
+# Rows fetched from the server-side cursor per round trip while streaming
+STREAM_FETCH_ROWS = int(os.getenv('STREAM_FETCH_ROWS', '2000'))
+
+# Supported ?stream= formats and their content types
+STREAM_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json'
+}
+
+def check_stream_format(stream: Optional[str]) -> Optional[str]:
+    """Validate a ?stream= value; raises HTTP 400 for unknown formats"""
+    if stream is not None and stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported stream format '{stream}' (expected one of: {', '.join(STREAM_MEDIA_TYPES)})"
+        )
+    return stream
+
+def iter_query_batches(sql: str, params: tuple, fetch_rows: int = None) -> Iterator[List[tuple]]:
+    """
+    Yield the rows of a query in batches of fetch_rows through a server-side (named) cursor,
+    so only one batch is held in memory. The pooled connection is held until the
+    iterator is exhausted or closed.
+    """
+    fetch_rows = fetch_rows or STREAM_FETCH_ROWS
+    with pooled_connection() as conn:
+        cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(fetch_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+# Each batch becomes one chunk of the response body, which keeps the per-chunk
+# overhead of StreamingResponse (a thread pool hop for sync iterators) per batch, not per row
+
+def iter_json_lines(batches: Iterator[List[tuple]], to_dict: Callable[[tuple], Dict]) -> Iterator[bytes]:
+    """Newline-delimited JSON: one object per line"""
+    for rows in batches:
+        yield b"".join(dumps(to_dict(row)) + b"\n" for row in rows)
+
+def iter_json_array(batches: Iterator[List[tuple]], to_dict: Callable[[tuple], Dict]) -> Iterator[bytes]:
+    """A single JSON array, written batch by batch"""
+    yield b"["
+    separator = b""
+    for rows in batches:
+        # Encoding the batch as a list and dropping its brackets is one encoder call per batch
+        yield separator + dumps([to_dict(row) for row in rows])[1:-1]
+        separator = b","
+    yield b"]\n"
+
+def stream_query(sql: str, params: tuple, to_dict: Callable[[tuple], Dict], stream: str) -> StreamingResponse:
+    """Stream a query's rows as NDJSON or a JSON array without materializing the result"""
+    batches = iter_query_batches(sql, params)
+    body = iter_json_lines(batches, to_dict) if stream == 'ndjson' else iter_json_array(batches, to_dict)
+    return StreamingResponse(body, media_type=STREAM_MEDIA_TYPES[stream])
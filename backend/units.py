@@ -0,0 +1,152 @@
+import os
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Rows updated per transaction by the canonical-unit backfill
+BACKFILL_BATCH_ROWS = int(os.getenv('BACKFILL_BATCH_ROWS', '5000'))
+
+# Factors from the free-text unit columns to canonical units (keys are lower-cased).
+# Missing weight units count as lbs and unknown ones as kg, matching the calorie calculation;
+# unknown time units count as minutes. Distances in unknown units are left NULL.
+KG_PER_WEIGHT_UNIT = {
+    'lbs': 0.453592,
+    'lb': 0.453592,
+    'pounds': 0.453592,
+    'kg': 1.0,
+    'kilograms': 1.0
+}
+DEFAULT_WEIGHT_UNITS = 'lbs'
+DEFAULT_KG_PER_WEIGHT_UNIT = 1.0
+
+SECONDS_PER_TIME_UNIT = {
+    'seconds': 1.0,
+    'sec': 1.0,
+    'minutes': 60.0,
+    'min': 60.0,
+    'hours': 3600.0,
+    'hr': 3600.0
+}
+DEFAULT_SECONDS_PER_TIME_UNIT = 60.0
+
+METERS_PER_DISTANCE_UNIT = {
+    'miles': 1609.344,
+    'mile': 1609.344,
+    'mi': 1609.344,
+    'km': 1000.0,
+    'kilometers': 1000.0,
+    'm': 1.0,
+    'meters': 1.0,
+    'yards': 0.9144,
+    'yd': 0.9144
+}
+
+def stored_value(value: float, places: int) -> float:
+    """
+    The value a DECIMAL(_, places) column ends up holding for a float parameter (psycopg2 sends
+    repr(value) and Postgres rounds half away from zero), so canonical values computed before
+    the insert match the ones the backfill computes from the stored column.
+    """
+    return float(Decimal(repr(float(value))).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP))
+
+def weight_kg(weight: Optional[float], weight_units: Optional[str]) -> Optional[float]:
+    """Weight in kg, or None without a weight"""
+    if weight is None:
+        return None
+    units = (weight_units or DEFAULT_WEIGHT_UNITS).lower()
+    return stored_value(weight, 2) * KG_PER_WEIGHT_UNIT.get(units, DEFAULT_KG_PER_WEIGHT_UNIT)
+
+def time_seconds(time: Optional[float], time_units: Optional[str]) -> Optional[float]:
+    """Duration in seconds, or None without a duration or units"""
+    if time is None or not time_units:
+        return None
+    return stored_value(time, 3) * SECONDS_PER_TIME_UNIT.get(time_units.lower(), DEFAULT_SECONDS_PER_TIME_UNIT)
+
+def distance_meters(distance: Optional[float], distance_units: Optional[str]) -> Optional[float]:
+    """Distance in meters, or None without a distance or with unknown units"""
+    if distance is None or not distance_units:
+        return None
+    factor = METERS_PER_DISTANCE_UNIT.get(distance_units.lower())
+    return stored_value(distance, 2) * factor if factor is not None else None
+
+def factor_sql(units_column: str, factors: Dict[str, float], default: Optional[float],
+               missing_units: Optional[str] = None) -> str:
+    """SQL CASE expression giving the conversion factor for a unit column (float8, NULL when unknown)"""
+    column = f"COALESCE({units_column}, '{missing_units}')" if missing_units else units_column
+    cases = " ".join(f"WHEN '{units}' THEN {factor}::float8" for units, factor in factors.items())
+    fallback = f"{default}::float8" if default is not None else "NULL"
+    return f"CASE LOWER({column}) {cases} ELSE {fallback} END"
+
+# The same conversions in SQL, as used by the backfill and by queries over unconverted rows
+WEIGHT_KG_SQL = (f"weight::float8 * "
+                 f"{factor_sql('weight_units', KG_PER_WEIGHT_UNIT, DEFAULT_KG_PER_WEIGHT_UNIT, DEFAULT_WEIGHT_UNITS)}")
+TIME_SECONDS_SQL = f"time::float8 * {factor_sql('time_units', SECONDS_PER_TIME_UNIT, DEFAULT_SECONDS_PER_TIME_UNIT)}"
+DISTANCE_METERS_SQL = f"distance::float8 * {factor_sql('distance_units', METERS_PER_DISTANCE_UNIT, None)}"
+
+# Canonical columns per table: (column, SQL expression, condition for rows that can be converted)
+CANONICAL_COLUMNS = {
+    'activities': {
+        'key': 'activity_id',
+        'columns': [
+            ('time_seconds', TIME_SECONDS_SQL, "time IS NOT NULL AND time_units IS NOT NULL"),
+            ('distance_meters', DISTANCE_METERS_SQL,
+             f"distance IS NOT NULL AND LOWER(distance_units) IN ({', '.join(repr(u) for u in METERS_PER_DISTANCE_UNIT)})")
+        ]
+    },
+    'biometrics': {
+        'key': 'biometric_id',
+        'columns': [
+            ('weight_kg', WEIGHT_KG_SQL, "weight IS NOT NULL")
+        ]
+    }
+}
+
+def backfill_canonical_units(cursor, table: str, batch_rows: int = None, commit: bool = True) -> int:
+    """
+    Fill NULL canonical unit columns of one table from the free-text originals.
+    Rows are walked in primary key order, batch_rows per UPDATE; with commit=True each batch is
+    committed separately so a large backfill never holds long row locks. Returns rows updated.
+    """
+    spec = CANONICAL_COLUMNS[table]
+    key = spec['key']
+    batch_rows = batch_rows or BACKFILL_BATCH_ROWS
+    pending = " OR ".join(f"({column} IS NULL AND {condition})" for column, _, condition in spec['columns'])
+    assignments = ", ".join(f"{column} = COALESCE({column}, {expression})" for column, expression, _ in spec['columns'])
+
+    updated = 0
+    last_key = 0
+    while True:
+        cursor.execute(f"""
+            WITH batch AS (
+                SELECT {key} FROM {table}
+                WHERE {key} > %s AND ({pending})
+                ORDER BY {key}
+                LIMIT %s
+            )
+            UPDATE {table} SET {assignments}
+            FROM batch WHERE {table}.{key} = batch.{key}
+            RETURNING {table}.{key}
+        """, (last_key, batch_rows))
+        keys = [row[0] for row in cursor.fetchall()]
+        if commit:
+            cursor.connection.commit()
+        if not keys:
+            break
+        updated += len(keys)
+        last_key = max(keys)
+    return updated
+
+def backfill_all(cursor, batch_rows: int = None) -> Dict:
+    """Run the canonical-unit backfill for every table and report rows updated and elapsed time"""
+    started = time.perf_counter()
+    updated = {table: backfill_canonical_units(cursor, table, batch_rows) for table in CANONICAL_COLUMNS}
+    return {"rows_updated": updated, "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+if __name__ == "__main__":
+    from db_connection import pooled_connection
+    with pooled_connection() as conn:
+        print(backfill_all(conn.cursor()))
@@ -0,0 +1,134 @@
+import os
+import time
+import bisect
+import datetime
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from db_connection import pooled_connection
+from units import WEIGHT_KG_SQL
+
+# Load environment variables
+load_dotenv()
+
+# (date, weight, weight_units, notes, weight_kg) as stored in biometrics
+WeightEntry = Tuple[datetime.date, Optional[float], Optional[str], Optional[str], Optional[float]]
+
+# A user's whole timeline, as WeightEntry rows oldest first
+WEIGHT_TIMELINE_SQL = """
+    SELECT date, weight::float8, weight_units, notes, weight_kg FROM biometrics
+    WHERE user_id = %s
+    ORDER BY date
+"""
+
+# The latest entry on or before a date, for dates only Postgres can parse (main.get_user_weight_kg)
+WEIGHT_AS_OF_SQL = """
+    SELECT weight::float8, weight_units, weight_kg FROM biometrics
+    WHERE user_id = %s AND date <= %s
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+# Weight in kg of the latest entry on or before each (user_id, date) pair, in input order.
+# Rows not yet backfilled are converted in SQL with the same factors as units.weight_kg.
+BATCH_WEIGHT_SQL = f"""
+    SELECT w.kg
+    FROM unnest(%s::integer[], %s::date[]) WITH ORDINALITY AS b(user_id, activity_date, ord)
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(weight_kg, {WEIGHT_KG_SQL}) AS kg FROM biometrics
+        WHERE biometrics.user_id = b.user_id AND biometrics.date <= b.activity_date
+        ORDER BY date DESC
+        LIMIT 1
+    ) AS w ON true
+    ORDER BY b.ord
+"""
+
+class WeightTimeline:
+    """One user's biometrics entries sorted by date, with bisect lookups"""
+
+    def __init__(self, entries: List[WeightEntry]):
+        self.entries = entries
+        self.dates = [entry[0] for entry in entries]
+        # Position of the newest entry that has a weight, for latest-weight lookups
+        self.latest_weight_index = next(
+            (index for index in range(len(entries) - 1, -1, -1) if entries[index][1] is not None), None
+        )
+
+    def as_of(self, date: datetime.date) -> Optional[WeightEntry]:
+        """The newest entry on or before date (its weight may be None), like ORDER BY date DESC LIMIT 1"""
+        index = bisect.bisect_right(self.dates, date) - 1
+        return self.entries[index] if index >= 0 else None
+
+    def latest_weight(self) -> Optional[WeightEntry]:
+        """The newest entry with a weight"""
+        return self.entries[self.latest_weight_index] if self.latest_weight_index is not None else None
+
+class WeightCache:
+    """
+    LRU cache of per-user weight timelines, loaded with one query per user on first use.
+    Writes to biometrics in this process invalidate the user's timeline; entries also expire
+    after ttl seconds so writes made by other processes are picked up.
+    """
+
+    def __init__(self, max_users: int = 10000, ttl: float = 60):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._timelines: "OrderedDict[int, Tuple[float, WeightTimeline]]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> WeightTimeline:
+        with self._lock:
+            cached = self._timelines.get(user_id)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self._timelines.move_to_end(user_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self._generation
+
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(WEIGHT_TIMELINE_SQL, (user_id,))
+            timeline = WeightTimeline(cursor.fetchall())
+            cursor.close()
+
+        with self._lock:
+            # Don't store a timeline that may predate a concurrent invalidation
+            if generation == self._generation:
+                self._timelines[user_id] = (time.monotonic(), timeline)
+                self._timelines.move_to_end(user_id)
+                while len(self._timelines) > self.max_users:
+                    self._timelines.popitem(last=False)
+        return timeline
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._timelines.pop(user_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._timelines.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "users": len(self._timelines),
+                "max_users": self.max_users,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None
+            }
+
+# Shared by every request handler in the process
+weight_cache = WeightCache(
+    max_users=int(os.getenv('WEIGHT_CACHE_MAX_USERS', '10000')),
+    ttl=float(os.getenv('WEIGHT_CACHE_TTL', '60'))
+)